@@ -0,0 +1,521 @@
+"""
+Fast export of the consolidated dataset to ``;``-separated CSV and to an
+uncompressed Arrow IPC (Feather) cache.
+
+Modes:
+- ``pandas``   - chunked ``DataFrame.to_csv`` (single-threaded, legacy);
+- ``arrow``    - Arrow CSV writer streaming record batches to the file;
+- ``parallel`` - chunks formatted by the Arrow CSV writer in a thread pool
+  (the formatting releases the GIL) and written in order to a single
+  output stream.
+
+Every mode can compress the output with ``gzip`` or ``zstd`` (Arrow
+compressed streams). Dates are written as ``YYYY-MM-DD`` and values are
+quoted only when needed, so the files stay readable with
+``pd.read_csv(path, sep=";")`` as before (:func:`read_csv` also reads the
+``zstd`` files without the ``zstandard`` package). The Arrow modes write
+integral floats without the decimal part (``12001`` instead of
+``12001.0``) and booleans in lowercase. ``read_csv`` parses them to the
+same values; the only difference is the dtype of float columns whose
+values are all integral (e.g. ``codRegiaoSaude``), read back as int64
+instead of float64.
+
+The Feather cache is written uncompressed, with string columns dictionary
+encoded, so readers can memory-map it (:func:`open_feather`): numeric
+columns are used in place, without copies, and every process on the host
+shares the same page-cache copy of the file.
+
+The cache is versioned: each write goes to a new file
+(``<name>.v<timestamp>.arrow``) and the ``<name>.arrow.current`` pointer is
+switched to it afterwards (:func:`feather_version` resolves it). A mapped
+file is never overwritten, which Windows would refuse, and readers keep
+the version they opened until they reopen the pointer.
+
+Bulk consumers get the dataset in a columnar format through
+:func:`scan_export` and :func:`stream_columnar`: the filtered record batches
+are read from the memory-mapped cache, grouped up to a minimum size and
+encoded as Parquet row groups or Arrow IPC messages, so an export of any
+size uses bounded memory.
+"""
+
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.fs as pa_fs
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+CSV_MODES = ["pandas", "arrow", "parallel"]
+CSV_COMPRESSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+# Columnar export formats: (media type, file extension)
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+}
+
+
+def output_path(path: str, compression: str = None) -> str:
+    """Adds the compression suffix (``.gz``/``.zst``) to ``path`` if missing."""
+    suffix = CSV_COMPRESSIONS[compression]
+    return path if path.endswith(suffix) else path + suffix
+
+
+def _open_stream(path: str, compression: str = None):
+    """Opens an Arrow output stream, compressed if requested."""
+    sink = pa.OSFile(path, "wb")
+    return pa.CompressedOutputStream(sink, compression) if compression else sink
+
+
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    """Converts the dataset to Arrow, writing timestamps as plain dates."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            dates = pc.cast(table.column(i), pa.date32(), safe=False)
+            table = table.set_column(i, field.name, dates)
+    return table
+
+
+def _format_chunk(table: pa.Table) -> bytes:
+    """
+    Formats a slice of the table as CSV rows (without header).
+
+    Values are written unquoted, as ``DataFrame.to_csv`` does; Arrow refuses
+    that when a value contains the delimiter or quotes, and only then the
+    chunk is formatted again quoting the strings.
+    """
+    for quoting_style in ("none", "needed"):
+        buffer = pa.BufferOutputStream()
+        options = pa_csv.WriteOptions(include_header=False, delimiter=";", quoting_style=quoting_style)
+        try:
+            pa_csv.write_csv(table, buffer, write_options=options)
+        except pa.ArrowInvalid:
+            continue
+        return buffer.getvalue().to_pybytes()
+
+
+def _header(df: pd.DataFrame) -> bytes:
+    """Header line in the same format as ``DataFrame.to_csv``."""
+    return df.iloc[:0].to_csv(sep=";", index=False).encode("utf-8")
+
+
+def _write_pandas(df: pd.DataFrame, stream, chunk_size: int) -> int:
+    written = stream.write(_header(df))
+    for start in tqdm(range(0, len(df), chunk_size), desc="Saving chunks", unit="chunk"):
+        chunk = df.iloc[start:start + chunk_size].to_csv(sep=";", index=False, header=False)
+        written += stream.write(chunk.encode("utf-8"))
+    return written
+
+
+def _write_arrow(df: pd.DataFrame, stream, chunk_size: int) -> int:
+    table = _to_arrow(df)
+    written = stream.write(_header(df))
+    for start in tqdm(range(0, len(df), chunk_size), desc="Saving chunks", unit="chunk"):
+        written += stream.write(_format_chunk(table.slice(start, chunk_size)))
+    return written
+
+
+def _write_parallel(df: pd.DataFrame, stream, chunk_size: int, workers: int) -> int:
+    table = _to_arrow(df)
+    written = stream.write(_header(df))
+    starts = iter(range(0, len(df), chunk_size))
+    pending = deque()
+    progress = tqdm(total=-(-len(df) // chunk_size), desc="Saving chunks", unit="chunk")
+
+    # At most 2 chunks per worker are kept in memory while waiting to be written
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in starts:
+            pending.append(pool.submit(_format_chunk, table.slice(start, chunk_size)))
+            if len(pending) >= 2 * workers:
+                written += stream.write(pending.popleft().result())
+                progress.update()
+        while pending:
+            written += stream.write(pending.popleft().result())
+            progress.update()
+    progress.close()
+    return written
+
+
+def write_csv(
+    df: pd.DataFrame,
+    path: str,
+    mode: str = "parallel",
+    compression: str = None,
+    chunk_size: int = 100_000,
+    workers: int = None,
+) -> dict:
+    """
+    Writes the dataset as a ``;``-separated CSV file.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Dataset to export.
+    path : str
+        Destination file. The ``.gz``/``.zst`` suffix is added when
+        compressing.
+    mode : str
+        ``"pandas"``, ``"arrow"`` or ``"parallel"``.
+    compression : str, optional
+        ``"gzip"`` or ``"zstd"``. No compression by default.
+    chunk_size : int
+        Rows formatted per chunk.
+    workers : int, optional
+        Threads of the ``parallel`` mode (default: number of CPUs).
+
+    Returns
+    -------
+    dict
+        ``path``, ``csv_bytes`` (uncompressed), ``file_bytes``, ``seconds``
+        and ``mb_per_s`` (uncompressed CSV throughput).
+    """
+    if mode not in CSV_MODES:
+        raise ValueError(f"Invalid CSV export mode: {mode!r}. Valid modes: {', '.join(CSV_MODES)}")
+    if compression not in CSV_COMPRESSIONS:
+        raise ValueError(f"Invalid CSV compression: {compression!r}. Use gzip, zstd or None.")
+
+    path = output_path(path, compression)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    # Written to a temporary name and renamed, so readers never see a partial file
+    tmp_path = f"{path}.tmp"
+    start = time.perf_counter()
+    with _open_stream(tmp_path, compression) as stream:
+        if mode == "pandas":
+            csv_bytes = _write_pandas(df, stream, chunk_size)
+        elif mode == "arrow":
+            csv_bytes = _write_arrow(df, stream, chunk_size)
+        else:
+            csv_bytes = _write_parallel(df, stream, chunk_size, workers or os.cpu_count() or 1)
+    os.replace(tmp_path, path)
+    seconds = time.perf_counter() - start
+
+    stats = {
+        "path": path,
+        "csv_bytes": csv_bytes,
+        "file_bytes": os.path.getsize(path),
+        "seconds": seconds,
+        "mb_per_s": csv_bytes / 1024 / 1024 / seconds if seconds else float("inf"),
+    }
+    print(
+        f"CSV saved to: {path} ({stats['file_bytes'] / 1024 / 1024:.2f} MB, "
+        f"{stats['mb_per_s']:.1f} MB/s, mode={mode}, compression={compression or 'none'})"
+    )
+    return stats
+
+
+def _pointer_path(path: str) -> str:
+    return f"{path}.current"
+
+
+def feather_version(path: str) -> str:
+    """
+    Current version of the Feather cache ``path``.
+
+    Returns the file named by the ``<path>.current`` pointer, ``path``
+    itself for a cache written before versioning, or None if there is no
+    cache yet.
+    """
+    try:
+        with open(_pointer_path(path), encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return path if os.path.exists(path) else None
+    return os.path.join(os.path.dirname(path), name)
+
+
+def write_pointer(pointer: str, name: str, attempts: int = 5):
+    """
+    Atomically sets the content of the pointer file ``pointer`` to ``name``.
+
+    Used to publish a new version of a file or directory: readers open the
+    pointer, read the name and open the target, so they see either the old
+    or the new target.
+    """
+    tmp_path = f"{pointer}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(name)
+    for attempt in range(attempts):
+        try:
+            os.replace(tmp_path, pointer)
+            return
+        except PermissionError:  # Windows: a reader has the pointer open right now
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.05)
+
+
+def _remove_old_versions(path: str, keep: set):
+    """
+    Deletes the versions of the cache not in ``keep``.
+
+    Files still mapped by a reader cannot be deleted on Windows; they are
+    left in place and removed by a later write.
+    """
+    folder = os.path.dirname(path) or "."
+    base = os.path.basename(path)
+    stem, ext = os.path.splitext(base)
+    version = re.compile(rf"{re.escape(stem)}\.v\d+{re.escape(ext)}$")
+    for name in os.listdir(folder):
+        if name not in keep and (name == base or version.match(name)):
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+
+def read_csv(path: str, **kwargs) -> pd.DataFrame:
+    """
+    Reads a CSV file written by :func:`write_csv`.
+
+    Compressed files are decompressed with the Arrow codec that wrote them,
+    so ``zstd`` does not need the optional ``zstandard`` package of pandas.
+    ``kwargs`` are passed to ``pd.read_csv``.
+    """
+    compression = next((c for c, suffix in CSV_COMPRESSIONS.items() if c and path.endswith(suffix)), None)
+    if compression is None:
+        return pd.read_csv(path, sep=";", **kwargs)
+    with pa.CompressedInputStream(pa.OSFile(path), compression) as stream:
+        return pd.read_csv(stream, sep=";", **kwargs)
+
+
+def write_feather(df: pd.DataFrame, path: str) -> dict:
+    """
+    Writes the dataset as a new version of an uncompressed Arrow IPC
+    (Feather v2) cache.
+
+    The table is written as a single record batch, with string columns
+    dictionary encoded (they become categoricals when read back), so every
+    column is one contiguous buffer in the file and
+    ``to_pandas(split_blocks=True)`` can use it in place. With the default
+    batches of 65,536 rows pandas would have to concatenate the chunks into
+    a private copy in each reader. The data goes to a new file next to ``path``
+    (``<name>.v<timestamp>.arrow``) and the ``<path>.current`` pointer is
+    switched to it only when it is complete, so new readers never see a
+    partial file and processes that have an older version mapped keep
+    reading it, on any platform. The previous version is kept for readers
+    that resolved the pointer just before the switch; older ones are
+    deleted.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Dataset to export.
+    path : str
+        Name of the cache (resolve it with :func:`feather_version`).
+
+    Returns
+    -------
+    dict
+        ``path`` (the new version), ``file_bytes`` and ``seconds``.
+    """
+    start = time.perf_counter()
+    table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    for i, field in enumerate(table.schema):
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            table = table.set_column(i, field.name, table.column(i).dictionary_encode())
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    previous = feather_version(path)
+    stem, ext = os.path.splitext(path)
+    version_path = f"{stem}.v{time.time_ns()}{ext}"
+    feather.write_feather(table, version_path, compression="uncompressed", chunksize=max(table.num_rows, 1))
+    write_pointer(_pointer_path(path), os.path.basename(version_path))
+    _remove_old_versions(path, {os.path.basename(version_path), os.path.basename(previous or "")})
+
+    stats = {"path": version_path, "file_bytes": os.path.getsize(version_path), "seconds": time.perf_counter() - start}
+    print(f"Feather cache saved to: {version_path} ({stats['file_bytes'] / 1024 / 1024:.2f} MB)")
+    return stats
+
+
+def open_feather(path: str, columns: list = None) -> pa.Table:
+    """
+    Opens the current version of a Feather cache written by
+    :func:`write_feather` with memory mapping.
+
+    The returned table references the mapped file directly (zero-copy);
+    ``table.to_pandas(split_blocks=True)`` keeps numeric columns without
+    nulls as read-only views over the mapping.
+
+    Parameters
+    ----------
+    path : str
+        Name of the cache, or a specific version file.
+    columns : list of str, optional
+        Subset of columns to expose.
+
+    Returns
+    -------
+    pyarrow.Table
+        Table backed by the memory-mapped file.
+    """
+    table = pa.ipc.open_file(pa.memory_map(feather_version(path) or path, "r")).read_all()
+    return table.select(columns) if columns else table
+
+
+def scan_export(
+    path: str,
+    columns: list = None,
+    estados: list = None,
+    municipios: list = None,
+    start: str = None,
+    end: str = None,
+    batch_size: int = 65_536,
+) -> tuple:
+    """
+    Opens a lazy, filtered scan of the consolidated dataset.
+
+    Filters and column selection are pushed down to the reader, and the
+    arguments are validated here, before any data is read.
+
+    Parameters
+    ----------
+    path : str
+        Feather cache (its current version is memory-mapped) or Parquet
+        file of the dataset.
+    columns : list of str, optional
+        Columns to export (default: all).
+    estados, municipios : list of str, optional
+        Keep only these states / municipalities.
+    start, end : str, optional
+        Inclusive date range (``YYYY-MM-DD``).
+    batch_size : int
+        Maximum rows per record batch.
+
+    Returns
+    -------
+    tuple
+        Output ``pyarrow.Schema`` and an iterator of ``RecordBatch``.
+
+    Raises
+    ------
+    ValueError
+        On unknown columns or invalid dates.
+    """
+    if path.endswith(".parquet"):
+        dataset = ds.dataset(path, format="parquet")
+    else:
+        # The default local filesystem reads the file into buffers; map it instead
+        filesystem = pa_fs.LocalFileSystem(use_mmap=True)
+        dataset = ds.dataset(os.path.abspath(feather_version(path) or path), format="feather", filesystem=filesystem)
+
+    unknown = [c for c in columns or [] if c not in dataset.schema.names]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+
+    conditions = []
+    if estados:
+        conditions.append(pc.field("estado").isin(estados))
+    if municipios:
+        conditions.append(pc.field("municipio").isin(municipios))
+    for bound, op in [(start, "__ge__"), (end, "__le__")]:
+        if bound:
+            try:
+                value = pd.Timestamp(bound).to_pydatetime()
+            except ValueError:
+                raise ValueError(f"Invalid date: {bound!r}. Use YYYY-MM-DD.") from None
+            conditions.append(getattr(pc.field("data"), op)(value))
+
+    condition = None
+    for c in conditions:
+        condition = c if condition is None else condition & c
+
+    scanner = dataset.scanner(columns=columns or None, filter=condition, batch_size=batch_size)
+    return scanner.projected_schema, scanner.to_batches()
+
+
+class _ChunkSink:
+    """Write-only file object that keeps the bytes written until drained."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_columnar(schema: pa.Schema, batches, fmt: str = "parquet", min_rows: int = 65_536):
+    """
+    Encodes record batches as a Parquet file or an Arrow IPC stream, chunk by chunk.
+
+    A filtered scan yields many small (or empty) batches, one or more per
+    fragment of the source. Empty batches are skipped and the others are
+    grouped until they hold at least ``min_rows`` rows; each group becomes
+    one Parquet row group (or one IPC message) and is yielded as soon as it
+    is encoded, so at most ``min_rows`` plus one batch are held in memory.
+
+    Parameters
+    ----------
+    schema : pyarrow.Schema
+        Schema of the batches.
+    batches : iterable of pyarrow.RecordBatch
+        Data to encode (e.g. from :func:`scan_export`).
+    fmt : str
+        ``"parquet"`` or ``"arrow"``.
+    min_rows : int
+        Minimum rows per row group / message (the last one may be smaller).
+
+    Yields
+    ------
+    bytes
+        Consecutive pieces of the encoded file.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid export format: {fmt!r}. Valid formats: {', '.join(EXPORT_FORMATS)}")
+
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    def write(group: list) -> bytes:
+        table = pa.Table.from_batches(group, schema)
+        if fmt == "parquet":
+            writer.write_table(table, row_group_size=table.num_rows)
+        else:
+            writer.write_table(table.combine_chunks())
+        return sink.drain()
+
+    group, rows = [], 0
+    for batch in batches:
+        if batch.num_rows == 0:
+            continue
+        group.append(batch)
+        rows += batch.num_rows
+        if rows >= min_rows:
+            yield write(group)
+            group, rows = [], 0
+    if group:
+        yield write(group)
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,295 @@
+"""
+Stage-level instrumentation for the COVID-19 ETL pipeline.
+
+For every stage it records:
+- wall time and CPU time;
+- peak resident memory (RSS) reached during the stage;
+- rows in / rows out;
+- bytes read / written by the process during the stage (logical I/O, see
+  :func:`io_counters`).
+
+The records are appended as JSON lines (one line per stage, tagged with the
+run id) so nightly runs can be compared, and can also be exported in the
+Prometheus text format for the node_exporter textfile collector.
+
+The peak RSS is per stage: on Linux the kernel high-water mark (``VmHWM``)
+is reset through ``/proc/self/clear_refs`` when the stage starts. Where the
+reset is not available, a background thread samples the RSS during the
+stage (``psutil`` or ``/proc/self/statm``). As a last resort the lifetime
+peak of the process (``ru_maxrss``) is reported, and ``peak_rss_scope`` is
+set to ``"process"`` so it is not mistaken for a stage value.
+
+``resource`` is not available on Windows; in that case ``psutil`` is used
+when installed, and the memory/IO fields are left empty otherwise.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _proc_status_kb(field: str) -> int:
+    """Value of a ``/proc/self/status`` field (Linux), in kilobytes."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """
+    Resets the peak RSS of the process to its current RSS (Linux only).
+
+    Returns True if the kernel high-water mark (``VmHWM``) was reset.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return _proc_status_kb("VmHWM") is not None
+
+
+def current_rss_bytes() -> int:
+    """Current resident set size of the process, in bytes."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss_bytes() -> int:
+    """
+    Peak resident set size of the current process, in bytes.
+
+    On Linux this is ``VmHWM``, the peak since the last
+    :func:`reset_peak_rss`; elsewhere it is the peak of the process lifetime.
+    """
+    hwm = _proc_status_kb("VmHWM")
+    if hwm is not None:
+        return hwm * 1024
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS reports bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    return None
+
+
+class RssSampler:
+    """
+    Samples the RSS in a daemon thread and keeps the maximum.
+
+    Used when the kernel peak cannot be reset; allocations shorter than
+    ``interval`` seconds may be missed.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def start(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> int:
+        """Stops sampling and returns the peak RSS seen, in bytes."""
+        self._stop.set()
+        self._thread.join()
+        return max(self.peak, current_rss_bytes())
+
+
+# Bytes of /proc/self/io read by io_counters itself, left out of the totals
+_own_reads = 0
+
+
+def io_counters() -> tuple:
+    """
+    Bytes read and written by the current process so far.
+
+    The counts are logical I/O: every byte passed through read/write system
+    calls (files, pipes, sockets), whether it came from the page cache or
+    from the disk. On Linux they are ``rchar``/``wchar`` of
+    ``/proc/self/io`` (minus the reads of that file by this function); with
+    ``psutil`` they are ``read_chars``/``write_chars`` (Linux) or the
+    read/write transfer counts (Windows, same meaning). Physical disk I/O
+    (psutil's ``read_bytes`` on Linux) is not used, so the fields mean the
+    same thing on every platform; where no logical counter exists (macOS)
+    they are left empty.
+    """
+    global _own_reads
+    try:
+        with open("/proc/self/io", "rb") as f:
+            content = f.read()
+        fields = dict(line.split(b": ") for line in content.splitlines())
+        counters = int(fields[b"rchar"]) - _own_reads, int(fields[b"wchar"])
+        _own_reads += len(content)
+        return counters
+    except (OSError, KeyError, ValueError):
+        pass
+    if psutil is not None:
+        try:
+            counters = psutil.Process().io_counters()
+        except (AttributeError, psutil.Error):
+            return None, None
+        if hasattr(counters, "read_chars"):
+            return counters.read_chars, counters.write_chars
+        if sys.platform == "win32":
+            return counters.read_bytes, counters.write_bytes
+    return None, None
+
+
+def count_rows(data) -> int:
+    """Number of rows of a DataFrame (or items of a list), if known."""
+    try:
+        return len(data)
+    except TypeError:
+        return None
+
+
+class StageMetrics:
+    """
+    Collects metrics of the pipeline stages of a single run.
+
+    Examples
+    --------
+    >>> metrics = StageMetrics()
+    >>> with metrics.stage("parse", rows_in=2) as record:
+    ...     df = parse(csv_files)
+    ...     record["rows_out"] = len(df)
+    >>> metrics.write_json("output/metrics/etl_metrics.jsonl")
+    """
+
+    def __init__(self, pipeline: str = "covid_etl"):
+        self.pipeline = pipeline
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.records = []
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = None):
+        """
+        Measures the enclosed block as stage ``name``.
+
+        Yields a dict where the caller can fill ``rows_out`` (and override
+        ``rows_in``, ``bytes_read`` or ``bytes_written`` when the stage knows
+        better than the process counters). The record is stored even when the
+        stage fails, with ``status`` set to ``"failed"``.
+        """
+        record = {
+            "pipeline": self.pipeline,
+            "run_id": self.run_id,
+            "stage": name,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "rows_in": rows_in,
+            "rows_out": None,
+        }
+        # Per-stage peak: reset the kernel high-water mark, or sample the RSS
+        sampler = None
+        if reset_peak_rss():
+            record["peak_rss_scope"] = "stage"
+        elif current_rss_bytes() is not None:
+            sampler = RssSampler().start()
+            record["peak_rss_scope"] = "stage"
+        else:
+            record["peak_rss_scope"] = "process"
+        read_start, written_start = io_counters()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        status = "failed"
+        try:
+            yield record
+            status = "ok"
+        finally:
+            read_end, written_end = io_counters()
+            record["status"] = status
+            record["wall_time_s"] = round(time.perf_counter() - wall_start, 4)
+            record["cpu_time_s"] = round(time.process_time() - cpu_start, 4)
+            record["peak_rss_bytes"] = sampler.stop() if sampler is not None else peak_rss_bytes()
+            if read_start is not None:
+                record.setdefault("bytes_read", read_end - read_start)
+                record.setdefault("bytes_written", written_end - written_start)
+            else:
+                record.setdefault("bytes_read", None)
+                record.setdefault("bytes_written", None)
+            self.records.append(record)
+            print(
+                f"[metrics] {name}: {record['wall_time_s']:.2f}s wall, "
+                f"{record['cpu_time_s']:.2f}s CPU, rows {record['rows_in']} → {record['rows_out']}"
+            )
+
+    def write_json(self, path: str):
+        """Appends the stage records to a JSON lines file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for record in self.records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"Metrics appended to: {path}")
+
+    def to_prometheus(self) -> str:
+        """Renders the stage records in the Prometheus text format."""
+        gauges = {
+            "wall_time_s": ("etl_stage_wall_seconds", "Wall time of the stage."),
+            "cpu_time_s": ("etl_stage_cpu_seconds", "CPU time of the stage."),
+            "peak_rss_bytes": ("etl_stage_peak_rss_bytes", "Peak RSS reached during the stage."),
+            "rows_in": ("etl_stage_rows_in", "Rows received by the stage."),
+            "rows_out": ("etl_stage_rows_out", "Rows produced by the stage."),
+            "bytes_read": ("etl_stage_bytes_read", "Bytes read through read syscalls during the stage."),
+            "bytes_written": ("etl_stage_bytes_written", "Bytes written through write syscalls during the stage."),
+        }
+        lines = []
+        for field, (metric, help_text) in gauges.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for record in self.records:
+                if record.get(field) is None:
+                    continue
+                labels = f'pipeline="{self.pipeline}",stage="{record["stage"]}",status="{record["status"]}"'
+                lines.append(f"{metric}{{{labels}}} {record[field]}")
+
+        lines.append("# HELP etl_last_run_timestamp_seconds End of the last pipeline run.")
+        lines.append("# TYPE etl_last_run_timestamp_seconds gauge")
+        lines.append(f'etl_last_run_timestamp_seconds{{pipeline="{self.pipeline}"}} {time.time():.0f}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """
+        Writes the Prometheus text file atomically, so the textfile collector
+        never reads a partially written file.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        print(f"Prometheus metrics saved to: {path}")
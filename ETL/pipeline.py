@@ -0,0 +1,505 @@
+"""
+COVID-19 Brazil ETL pipeline.
+
+Stages:
+1. extract - Extract the semester CSV files from the most recent ZIP archive.
+2. parse   - Read and concatenate all extracted CSV files.
+3. clean   - Convert types, sort and fill missing values.
+4. derive  - Treat retroactive corrections and outliers (data quality stage).
+5. write   - Save the consolidated dataset as CSV, Parquet and Feather and
+             update the ranking and per-date snapshot tables, all in a new
+             release directory published at the end (see
+             :mod:`ETL.release`).
+
+Every stage is measured by :class:`ETL.metrics.StageMetrics` (wall/CPU
+time, peak RSS, rows and bytes in/out).
+
+The ``parse``, ``clean`` and ``derive`` stages store a Parquet checkpoint, so
+the pipeline can be resumed from any stage without rerunning the previous
+ones:
+
+    python -m ETL.pipeline                       # full run
+    python -m ETL.pipeline --resume-from derive  # reuse the clean checkpoint
+    python -m ETL.pipeline --stages write        # only rewrite the outputs
+"""
+
+import argparse
+import glob
+import os
+import sys
+import zipfile
+
+import pandas as pd
+from tqdm import tqdm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ETL.export import write_csv, write_feather
+from ETL.metrics import StageMetrics, count_rows
+from ETL.quality import run_quality_checks
+from ETL.rankings import update_rankings
+from ETL.release import discard, new_release, publish, release_outputs
+from ETL.snapshots import update_snapshots
+from base.config import (
+    CHECKPOINT_PATH,
+    CONSOLIDATED_CSV,
+    CSV_CHUNK_SIZE,
+    CSV_COMPRESSION,
+    CSV_EXPORT_MODE,
+    CSV_PATTERN,
+    EXTRACT_PATH,
+    FEATHER_FILE,
+    INPUT_PATH,
+    METRICS_FILE,
+    METRICS_PROMETHEUS_FILE,
+    PARQUET_FILE,
+    PIPELINE_CHECKPOINTS,
+    QUALITY_MIN_EXCESS,
+    QUALITY_MODE,
+    QUALITY_REPORT_FILE,
+    QUALITY_WINDOW,
+    QUALITY_Z_THRESHOLD,
+    RANKING_TOP_N,
+    RANKINGS_BASE_FILE,
+    RANKINGS_FILE,
+    RANKINGS_REBUILD,
+    SNAPSHOT_DAYS_PER_ROW_GROUP,
+    SNAPSHOT_ESTADOS_FILE,
+    SNAPSHOT_MUNICIPIOS_FILE,
+)
+
+# Pipeline stages, in execution order
+STAGES = ["extract", "parse", "clean", "derive", "write"]
+
+
+# ==============================================================
+# Stages
+# ==============================================================
+
+def find_latest_zip(input_dir: str = INPUT_PATH) -> str:
+    """Returns the most recently modified ZIP file in ``input_dir``."""
+    zip_files = glob.glob(os.path.join(input_dir, "*.zip"))
+    if not zip_files:
+        raise FileNotFoundError(f"No ZIP files found in: {input_dir}")
+    return max(zip_files, key=os.path.getmtime)
+
+
+def extract(zip_path: str = None, extract_path: str = EXTRACT_PATH) -> list:
+    """
+    Extracts the semester CSV files from a ZIP archive.
+
+    Parameters
+    ----------
+    zip_path : str, optional
+        ZIP file to extract. Defaults to the most recent ZIP in the input
+        directory.
+    extract_path : str
+        Directory where the files will be extracted.
+
+    Returns
+    -------
+    list of str
+        Paths of the extracted ``HIST_PAINEL_COVIDBR_*.csv`` files.
+    """
+    zip_path = zip_path or find_latest_zip()
+    print(f"Extracting files from: {zip_path}")
+    os.makedirs(extract_path, exist_ok=True)
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        zip_ref.extractall(extract_path)
+    print(f"Extraction completed. Files saved to: {extract_path}")
+    return list_csv_files(extract_path)
+
+
+def list_csv_files(extract_path: str = EXTRACT_PATH) -> list:
+    """Lists the extracted semester CSV files, sorted by name."""
+    return sorted(glob.glob(os.path.join(extract_path, CSV_PATTERN)))
+
+
+def parse(csv_files: list) -> pd.DataFrame:
+    """
+    Reads and concatenates the semester CSV files.
+
+    Parameters
+    ----------
+    csv_files : list of str
+        CSV files in the ``HIST_PAINEL_COVIDBR`` layout (``;``-separated).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Raw records of all files.
+    """
+    if not csv_files:
+        raise FileNotFoundError("No HIST_PAINEL_COVIDBR CSV files to parse.")
+    print(f"{len(csv_files)} CSV files found.\n")
+
+    dfs = []
+    for file in tqdm(csv_files, desc="Reading CSV files", unit="file"):
+        dfs.append(pd.read_csv(file, sep=";", encoding="utf-8", low_memory=False))
+
+    df = pd.concat(dfs, ignore_index=True)
+    print(f"Unified dataset: {df.shape[0]:,} rows × {df.shape[1]} columns.".replace(",", "."))
+    return df
+
+
+def clean(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts types, sorts and fills missing values.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Raw records returned by :func:`parse`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Cleaned dataset sorted by state, city and date.
+    """
+    df["data"] = pd.to_datetime(df["data"], errors="coerce")
+    df = df.sort_values(by=["estado", "municipio", "data"])
+
+    # Fill missing categorical fields
+    df["estado"] = df["estado"].fillna("BR")
+    df["municipio"] = df["municipio"].fillna("Not informed")
+    df["nomeRegiaoSaude"] = df["nomeRegiaoSaude"].fillna("Unknown")
+    df["codRegiaoSaude"] = df["codRegiaoSaude"].fillna(-1)
+    df["interior/metropolitana"] = (
+        df["interior/metropolitana"].fillna("Unknown").astype(str)
+    )
+
+    # Fill population using the median per state
+    df["populacaoTCU2019"] = (
+        df.groupby("estado")["populacaoTCU2019"]
+        .transform(lambda x: x.fillna(x.median()))
+    )
+
+    # Replace NaNs in case and death counts with zeros
+    for col in ["casosAcumulado", "casosNovos", "obitosAcumulado", "obitosNovos"]:
+        if col in df.columns:
+            df[col] = df[col].fillna(0)
+
+    # IBGE municipality code (6 digits), empty for state and national rows
+    if "codmun" in df.columns:
+        df["codmun"] = pd.to_numeric(df["codmun"], errors="coerce").astype("Int64")
+
+    # Remove irrelevant columns if present
+    return df.drop(
+        columns=["Recuperadosnovos", "emAcompanhamentoNovos"],
+        errors="ignore",
+    )
+
+
+def derive(df: pd.DataFrame, report_path: str = QUALITY_REPORT_FILE) -> pd.DataFrame:
+    """
+    Derives the treated daily counts and quality flags.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Cleaned dataset returned by :func:`clean`.
+    report_path : str, optional
+        CSV file of the quality report (``None`` to skip it).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Dataset with retroactive corrections and outliers treated.
+    """
+    df, _ = run_quality_checks(
+        df,
+        window=QUALITY_WINDOW,
+        z_threshold=QUALITY_Z_THRESHOLD,
+        mode=QUALITY_MODE,
+        report_path=report_path,
+        min_excess=QUALITY_MIN_EXCESS,
+    )
+    return df
+
+
+def write(
+    df: pd.DataFrame,
+    csv_path: str = CONSOLIDATED_CSV,
+    parquet_path: str = PARQUET_FILE,
+    feather_path: str = FEATHER_FILE,
+    rankings_path: str = RANKINGS_FILE,
+    rankings_base_path: str = RANKINGS_BASE_FILE,
+    snapshot_states_path: str = SNAPSHOT_ESTADOS_FILE,
+    snapshot_municipalities_path: str = SNAPSHOT_MUNICIPIOS_FILE,
+) -> pd.DataFrame:
+    """
+    Saves the consolidated dataset as ``;``-separated CSV, Parquet and an
+    uncompressed Feather cache for the dashboard, updates the ranking
+    tables incrementally (see :mod:`ETL.rankings`) and rewrites the
+    per-date snapshot tables used by the map (see :mod:`ETL.snapshots`).
+    Every file is written to a temporary name and renamed (the Feather
+    cache to a new version file, see :func:`ETL.export.write_feather`), so
+    no reader sees a partial file. The files are replaced one at a time;
+    :func:`run_pipeline` writes them into a release directory published at
+    once (see :mod:`ETL.release`).
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Final dataset.
+    csv_path : str
+        Destination of the consolidated CSV file (see :mod:`ETL.export`
+        for the export mode and compression settings).
+    parquet_path : str
+        Destination of the consolidated Parquet file.
+    feather_path : str
+        Name of the memory-mappable Feather cache (versioned).
+    rankings_path, rankings_base_path : str
+        Rankings table and its incremental base table.
+    snapshot_states_path, snapshot_municipalities_path : str
+        Per-date snapshot tables.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The same DataFrame, so the pipeline result can be reused.
+    """
+    print("\nSaving consolidated dataset...\n")
+    write_csv(
+        df,
+        csv_path,
+        mode=CSV_EXPORT_MODE,
+        compression=CSV_COMPRESSION,
+        chunk_size=CSV_CHUNK_SIZE,
+    )
+
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    tmp_path = f"{parquet_path}.tmp"
+    df.to_parquet(tmp_path, engine="pyarrow", compression="snappy", index=False)
+    os.replace(tmp_path, parquet_path)
+    print(f"Parquet saved to: {parquet_path} ({os.path.getsize(parquet_path) / 1024 / 1024:.2f} MB)")
+
+    write_feather(df, feather_path)
+
+    update_rankings(df, rankings_base_path, rankings_path, top_n=RANKING_TOP_N, rebuild=RANKINGS_REBUILD)
+    update_snapshots(df, snapshot_states_path, snapshot_municipalities_path, SNAPSHOT_DAYS_PER_ROW_GROUP)
+
+    print(f"\nTotal rows: {len(df):,}".replace(",", "."))
+    print(f"Date range: {df['data'].min().date()} → {df['data'].max().date()}")
+    return df
+
+
+# ==============================================================
+# Orchestration
+# ==============================================================
+
+def checkpoint_file(stage: str, checkpoint_dir: str = CHECKPOINT_PATH) -> str:
+    """Path of the Parquet checkpoint written after ``stage``."""
+    return os.path.join(checkpoint_dir, f"{stage}.parquet")
+
+
+def select_stages(stages: list = None, resume_from: str = None) -> list:
+    """
+    Resolves which stages should run, keeping the pipeline order.
+
+    Parameters
+    ----------
+    stages : list of str, optional
+        Explicit subset of stages. Defaults to all stages.
+    resume_from : str, optional
+        First stage to run; earlier stages are skipped.
+
+    Returns
+    -------
+    list of str
+        Selected stage names, in execution order.
+
+    Raises
+    ------
+    ValueError
+        On unknown stages or on a non-contiguous selection (e.g. ``clean``
+        and ``write`` without ``derive``).
+    """
+    selected = list(stages) if stages else list(STAGES)
+    unknown = [s for s in selected + [resume_from] if s and s not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)}. Valid stages: {', '.join(STAGES)}")
+
+    start = STAGES.index(resume_from) if resume_from else 0
+    selected = [s for s in STAGES[start:] if s in selected]
+
+    # A gap would make the later stages read a stale checkpoint instead of
+    # the output that was just produced
+    positions = [STAGES.index(s) for s in selected]
+    if positions and positions != list(range(positions[0], positions[-1] + 1)):
+        missing = [s for s in STAGES[positions[0]:positions[-1] + 1] if s not in selected]
+        raise ValueError(
+            f"Stages must be contiguous; missing: {', '.join(missing)}. "
+            f"Run them too, or use --resume-from to start later in the pipeline."
+        )
+    return selected
+
+
+def load_stage_input(stage: str, checkpoint_dir: str = CHECKPOINT_PATH, extract_path: str = EXTRACT_PATH):
+    """
+    Loads the input of ``stage`` from the output of the previous stage.
+
+    ``parse`` reads the CSV files already extracted to ``extract_path``; the
+    other stages read the checkpoint written by the stage right before them.
+    """
+    if stage == "parse":
+        return list_csv_files(extract_path)
+
+    previous = STAGES[STAGES.index(stage) - 1]
+    path = checkpoint_file(previous, checkpoint_dir)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Checkpoint of stage '{previous}' not found ({path}). "
+            f"Run the pipeline from '{previous}' first."
+        )
+    print(f"Loading checkpoint: {path}")
+    return pd.read_parquet(path)
+
+
+def run_stage(stage: str, data, zip_path: str = None, extract_path: str = EXTRACT_PATH, outputs: dict = None):
+    """
+    Runs a single stage on the output of the previous one.
+
+    ``outputs`` are the destination paths of the write stage (default: the
+    configured paths).
+    """
+    if stage == "extract":
+        return extract(zip_path, extract_path)
+    if stage == "write":
+        return write(data, **(outputs or {}))
+    return {"parse": parse, "clean": clean, "derive": derive}[stage](data)
+
+
+def run_pipeline(
+    zip_path: str = None,
+    stages: list = None,
+    resume_from: str = None,
+    checkpoints: bool = PIPELINE_CHECKPOINTS,
+    checkpoint_dir: str = CHECKPOINT_PATH,
+    metrics: StageMetrics = None,
+    extract_path: str = EXTRACT_PATH,
+    release_dir: str = None,
+    publish_release: bool = True,
+):
+    """
+    Runs the selected stages of the ETL pipeline.
+
+    The write stage writes every published file into a release directory
+    (see :mod:`ETL.release`), which is published right after it, unless
+    ``publish_release`` is False: then the caller publishes it once its
+    own steps (e.g. the SQL load) succeeded, or discards it.
+
+    Parameters
+    ----------
+    zip_path : str, optional
+        ZIP file for the extract stage. Defaults to the most recent ZIP in
+        the input directory.
+    stages : list of str, optional
+        Subset of stages to run. Defaults to all stages.
+    resume_from : str, optional
+        Stage from which the pipeline is resumed.
+    checkpoints : bool
+        Whether to save a Parquet checkpoint after ``parse``, ``clean`` and
+        ``derive``.
+    checkpoint_dir : str
+        Directory of the checkpoints.
+    metrics : StageMetrics, optional
+        Collector that receives one record per stage. A new one is used
+        if not informed.
+    extract_path : str
+        Directory of the extracted CSV files.
+    release_dir : str, optional
+        Release directory for the write stage (default: a new one).
+    publish_release : bool
+        Publish the release after the write stage.
+
+    Returns
+    -------
+    pandas.DataFrame or list
+        Output of the last executed stage (the list of CSV files if only
+        ``extract`` ran).
+    """
+    selected = select_stages(stages, resume_from)
+    metrics = metrics if metrics is not None else StageMetrics()
+    print(f"Running stages: {' → '.join(selected)}\n")
+
+    data = None
+    previous = None
+    outputs = None
+    for stage in selected:
+        print(f"\n[{stage}]")
+        with metrics.stage(stage) as record:
+            # Stages that did not receive their input in this run load it from disk
+            if stage != "extract" and previous != STAGES[STAGES.index(stage) - 1]:
+                data = load_stage_input(stage, checkpoint_dir, extract_path)
+            record["rows_in"] = count_rows(data)
+
+            if stage == "write":
+                created = release_dir is None
+                release_dir = release_dir or new_release()
+                outputs = release_outputs(release_dir)
+            try:
+                data = run_stage(stage, data, zip_path, extract_path, outputs)
+            except BaseException:
+                if stage == "write" and created:
+                    discard(release_dir)
+                raise
+
+            if checkpoints and stage in ("parse", "clean", "derive"):
+                os.makedirs(checkpoint_dir, exist_ok=True)
+                data.to_parquet(checkpoint_file(stage, checkpoint_dir), engine="pyarrow", index=False)
+            record["rows_out"] = count_rows(data)
+        previous = stage
+
+    if outputs is not None and publish_release:
+        publish(release_dir)
+    return data
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """Command line options of the pipeline."""
+    parser = argparse.ArgumentParser(description="COVID-19 Brazil ETL pipeline.")
+    parser.add_argument("--zip", dest="zip_path", help="ZIP file to extract (default: most recent in input/).")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, help="Stages to run (default: all).")
+    parser.add_argument("--resume-from", choices=STAGES, help="Skip the stages before this one.")
+    parser.add_argument("--no-checkpoints", action="store_true", help="Do not save stage checkpoints.")
+    parser.add_argument("--metrics-json", default=METRICS_FILE, help="JSON lines file that receives the stage metrics.")
+    parser.add_argument(
+        "--metrics-prometheus",
+        default=METRICS_PROMETHEUS_FILE,
+        help="Prometheus text file for the stage metrics (default: disabled).",
+    )
+    args = parser.parse_args(argv)
+    try:
+        select_stages(args.stages, args.resume_from)
+    except ValueError as exc:
+        parser.error(str(exc))
+    return args
+
+
+def save_metrics(metrics: StageMetrics, args: argparse.Namespace):
+    """Writes the collected metrics to the destinations chosen in the CLI."""
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+    if args.metrics_prometheus:
+        metrics.write_prometheus(args.metrics_prometheus)
+
+
+def main(argv: list = None):
+    """Command line entry point."""
+    args = parse_args(argv)
+    metrics = StageMetrics()
+    try:
+        run_pipeline(
+            zip_path=args.zip_path,
+            stages=args.stages,
+            resume_from=args.resume_from,
+            checkpoints=not args.no_checkpoints,
+            metrics=metrics,
+        )
+    finally:
+        save_metrics(metrics, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Data quality stage for the Brazilian COVID-19 dataset.
+
+Steps:
+1. Detect retroactive corrections (negative daily counts) per municipality.
+2. Detect outliers with a robust z-score over rolling windows (MAD, or the
+   mean absolute deviation where the MAD is zero).
+3. Redistribute (or only flag) the affected values.
+4. Build a per-municipality quality report.
+
+All operations are vectorized over the whole DataFrame (grouped cumulative
+sums, rolling medians and shifts), so the cleaning runs once at ingest
+instead of being repeated on every dashboard render.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Count columns checked by the quality stage
+COUNT_COLUMNS = ["casosNovos", "obitosNovos"]
+
+# Columns that identify a single time series (one municipality or aggregate).
+# ``codmun`` is empty on state aggregates and set on the per-state "unknown
+# municipality" rows, which share the same ``estado``/``municipio`` after
+# the clean stage.
+SERIES_KEYS = ["estado", "municipio", "codmun"]
+
+# Scale factors that make the MAD / mean absolute deviation consistent
+# with the standard deviation
+MAD_SCALE = 0.6745
+MEAN_AD_SCALE = 1.2533
+
+
+def _flag_name(prefix: str, col: str) -> str:
+    """Builds the name of a flag column, e.g. ``correcaoCasos``."""
+    return prefix + col.replace("Novos", "").capitalize()
+
+
+def _rolling(values: pd.Series, groups: list, window: int, stat: str = "median") -> pd.Series:
+    """Centered rolling statistic computed independently for each series."""
+    rolling = values.groupby(groups, sort=False).rolling(window, min_periods=1, center=True)
+    return (
+        getattr(rolling, stat)()
+        .reset_index(level=list(range(len(groups))), drop=True)
+        .reindex(values.index)
+    )
+
+
+def _robust_scale(deviation: pd.Series, groups: list, window: int) -> pd.Series:
+    """
+    Rolling robust estimate of the standard deviation.
+
+    Uses the MAD; where it is zero (sparse series, in which most days equal
+    the median) falls back to the mean absolute deviation. Windows where
+    both are zero get an empty scale, so no day in them is an outlier.
+    """
+    absolute = deviation.abs()
+    mad = _rolling(absolute, groups, window, "median")
+    mean_ad = _rolling(absolute, groups, window, "mean")
+    scale = (mad / MAD_SCALE).where(mad > 0, MEAN_AD_SCALE * mean_ad)
+    return scale.where(scale > 0)
+
+
+def _correct_negatives(values: pd.Series, groups: list) -> pd.Series:
+    """
+    Absorbs negative daily counts into the preceding days.
+
+    The running total of each series is replaced by its reverse running
+    minimum, so a retroactive correction lowers the earlier days that were
+    overstated instead of producing a negative day. The series total is
+    preserved whenever it is non-negative.
+    """
+    cumulative = values.groupby(groups, sort=False).cumsum()
+    monotone = (
+        cumulative.iloc[::-1]
+        .groupby(groups, sort=False)
+        .cummin()
+        .iloc[::-1]
+        .clip(lower=0)
+    )
+    corrected = monotone.groupby(groups, sort=False).diff()
+    return corrected.fillna(monotone)
+
+
+def _spread_backwards(excess: pd.Series, groups: list, window: int) -> pd.Series:
+    """
+    Spreads each excess value evenly over the ``window`` preceding days.
+
+    Uses grouped cumulative sums, so the amount received by day ``t`` is the
+    sum of the shares of the outliers in ``(t, t + window]``.
+    """
+    position = excess.groupby(groups, sort=False).cumcount()
+    receivers = np.minimum(position, window)
+    share = (excess / receivers.where(receivers > 0)).fillna(0.0)
+
+    running = share.groupby(groups, sort=False).cumsum()
+    ahead = running.groupby(groups, sort=False).shift(-window)
+    last = running.groupby(groups, sort=False).transform("last")
+    return ahead.fillna(last) - running
+
+
+def run_quality_checks(
+    df: pd.DataFrame,
+    window: int = 28,
+    z_threshold: float = 10.0,
+    mode: str = "redistribute",
+    report_path: str = None,
+    min_excess: float = 50,
+) -> tuple:
+    """
+    Detects and treats retroactive corrections and outliers in daily counts.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Dataset with ``estado``, ``municipio``, ``data`` and the daily
+        count columns (``casosNovos``, ``obitosNovos``).
+    window : int
+        Size (in days) of the rolling window used by the robust z-score
+        and of the redistribution window for outliers.
+    z_threshold : float
+        Robust z-score above which a daily count is considered an outlier.
+    mode : str
+        ``"redistribute"`` rewrites the daily counts (negative corrections
+        are absorbed by the previous days and outliers are capped at the
+        rolling median, with the excess spread over the preceding window).
+        ``"flag"`` keeps the raw values and only adds the flag columns.
+    report_path : str, optional
+        If informed, the quality report is saved as a ``;``-separated CSV.
+    min_excess : float
+        Minimum distance to the rolling median for a day to be an outlier,
+        so isolated small reports (e.g. the first cases of a small town)
+        are never spread over the previous days.
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        The treated dataset (with boolean ``correcao*``/``outlier*`` flag
+        columns) and the per-series quality report.
+    """
+    if mode not in ("redistribute", "flag"):
+        raise ValueError(f"Invalid quality mode: {mode!r}")
+
+    # Datasets without ``codmun`` (older checkpoints) are keyed by state and city
+    keys = [key for key in SERIES_KEYS if key in df.columns]
+    df = df.sort_values(by=keys + ["data"], kind="stable")
+    series_id = df.groupby(keys, sort=False, dropna=False, observed=True).ngroup()
+    groups = [series_id]
+    summary = {}
+
+    for col in COUNT_COLUMNS:
+        if col not in df.columns:
+            continue
+
+        raw = df[col].astype("float64")
+        negative = raw < 0
+        corrected = _correct_negatives(raw, groups)
+
+        # Robust z-score: distance to the rolling median in MAD units
+        median = _rolling(corrected, groups, window, "median")
+        deviation = corrected - median
+        zscore = deviation / _robust_scale(deviation, groups, window)
+        # The first day of a series has no preceding days to absorb the excess
+        position = corrected.groupby(groups, sort=False).cumcount()
+        outlier = (zscore > z_threshold) & (deviation >= min_excess) & (position > 0)
+        excess = deviation.where(outlier, 0.0)
+
+        if mode == "redistribute":
+            treated = corrected - excess + _spread_backwards(excess, groups, window)
+            # Round the running total (not each day) so series totals are kept
+            running = treated.groupby(groups, sort=False).cumsum().round()
+            treated = running.groupby(groups, sort=False).diff().fillna(running)
+            df[col] = treated.astype(df[col].dtype)
+
+        df[_flag_name("correcao", col)] = negative.to_numpy()
+        df[_flag_name("outlier", col)] = outlier.to_numpy()
+
+        summary[f"{col}_correcoes"] = negative
+        summary[f"{col}_ajusteNegativo"] = raw.where(negative, 0.0)
+        summary[f"{col}_outliers"] = outlier
+        summary[f"{col}_excesso"] = excess
+
+    report = (
+        pd.DataFrame(summary)
+        .join(df[keys])
+        .groupby(keys, sort=True, dropna=False, observed=True)
+        .sum()
+        .reset_index()
+    )
+    count_cols = [c for c in report.columns if c.endswith(("_correcoes", "_outliers"))]
+    report = report[report[count_cols].sum(axis=1) > 0]
+
+    print("\nData quality summary:")
+    for col in COUNT_COLUMNS:
+        if f"{col}_correcoes" in report.columns:
+            print(
+                f"{col}: {int(report[f'{col}_correcoes'].sum()):,} retroactive corrections, "
+                f"{int(report[f'{col}_outliers'].sum()):,} outliers ({mode})"
+            )
+
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        report.to_csv(report_path, sep=";", index=False)
+        print(f"Quality report saved to: {report_path}")
+
+    return df, report
@@ -0,0 +1,282 @@
+"""
+Precomputed top-N ranking tables for the COVID-19 dashboard and API.
+
+Two tables are maintained:
+- the *base* table, with one row per (level, estado, municipio, period)
+  holding the cumulative cases/deaths at the start and at the end of the
+  period, the population and the last date folded in;
+- the *rankings* table, with the top-N municipalities and states per
+  period and metric (cases, deaths and their rates per 100k inhabitants).
+
+Municipalities are keyed by (estado, municipio), so cities with the same
+name in different states are ranked separately. Periods are ``total`` and
+each calendar year. The per-state series of cases not attributed to a
+municipality (``municipio`` empty, ``codmun`` set to the state code
+followed by ``0000``) is neither a municipality nor the state total, so it
+is left out of the rankings.
+
+The base table is updated incrementally: only rows newer than the last date
+of each series are read, the end-of-period values are replaced and the
+start-of-period values are set once, when a period first appears. Values
+come from the official cumulative columns, so they do not depend on how
+the daily counts were treated by the quality stage.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Name given by the clean stage to rows without municipality: state and
+# national aggregates (no codmun) and unknown-municipality series (codmun set)
+AGGREGATE_MUNICIPIO = "Not informed"
+
+KEYS = ["nivel", "estado", "municipio"]
+METRICS = ["casos", "obitos", "casos_100k", "obitos_100k"]
+
+
+def cumulative_series(df: pd.DataFrame, columns: list = (), include_unknown: bool = False) -> pd.DataFrame:
+    """
+    Daily cumulative series of each municipality and state.
+
+    States use their aggregate rows (no ``codmun``) when the dataset has
+    them; otherwise they are the sum of their municipalities, including the
+    cases not attributed to a municipality. ``columns`` are extra columns
+    kept as they are (empty for summed states).
+
+    The unknown-municipality rows (``codmun`` set, no municipality name)
+    are returned as municipality-level series only with
+    ``include_unknown``, with population 0 since they have none. Without
+    the ``codmun`` column they cannot be told apart from the state rows.
+    """
+    cols = ["estado", "municipio", "data", "casosAcumulado", "obitosAcumulado", "populacaoTCU2019", *columns]
+    has_codmun = "codmun" in df.columns
+    df = df[cols + ["codmun"] if has_codmun and "codmun" not in cols else cols]
+
+    aggregate = df["municipio"] == AGGREGATE_MUNICIPIO
+    unknown = aggregate & df["codmun"].notna() if has_codmun else pd.Series(False, index=df.index)
+
+    municipal = df[~aggregate].assign(nivel="municipio")
+    unknown_rows = df[unknown].assign(nivel="municipio", populacaoTCU2019=0)
+    states = df[aggregate & ~unknown & (df["estado"] != "BR")].assign(nivel="estado")
+
+    reported = pd.concat([municipal, unknown_rows])
+    missing = ~reported["estado"].isin(states["estado"].unique())
+    if missing.any():
+        summed = (
+            reported[missing]
+            .groupby(["estado", "data"], as_index=False, observed=True)
+            [["casosAcumulado", "obitosAcumulado", "populacaoTCU2019"]]
+            .sum()
+            .assign(nivel="estado", municipio=AGGREGATE_MUNICIPIO)
+        )
+        states = pd.concat([states, summed], ignore_index=True)
+
+    parts = [municipal, unknown_rows, states] if include_unknown else [municipal, states]
+    series = pd.concat(parts, ignore_index=True)[cols + ["nivel"]]
+    for key in KEYS:
+        series[key] = series[key].astype(str)
+    return series.sort_values(KEYS + ["data"], kind="stable")
+
+
+def _period_rows(series: pd.DataFrame, previous: pd.DataFrame) -> pd.DataFrame:
+    """
+    Start/end cumulative values per (series, period) of the given rows.
+
+    ``previous`` holds the last known cumulative values of each series
+    (columns ``casosAnterior``/``obitosAnterior``), used as the start of the
+    first period found in the new rows.
+    """
+    series = series.assign(periodo=series["data"].dt.year.astype(str))
+    series = series.merge(previous, on=KEYS, how="left")
+
+    # Cumulative value of the row before, within the series
+    groups = series.groupby(KEYS, sort=False)
+    for col, prev in [("casosAcumulado", "casosAnterior"), ("obitosAcumulado", "obitosAnterior")]:
+        series[f"{col}_prev"] = groups[col].shift(1).fillna(series[prev]).fillna(0)
+
+    by_period = series.groupby(KEYS + ["periodo"], sort=False)
+    first = by_period.head(1).set_index(KEYS + ["periodo"])
+    last = by_period.tail(1).set_index(KEYS + ["periodo"])
+
+    years = pd.DataFrame({
+        "inicio_casos": first["casosAcumulado_prev"].astype("float64"),
+        "inicio_obitos": first["obitosAcumulado_prev"].astype("float64"),
+        "fim_casos": last["casosAcumulado"].astype("float64"),
+        "fim_obitos": last["obitosAcumulado"].astype("float64"),
+        "populacao": last["populacaoTCU2019"].astype("float64"),
+        "ultima_data": last["data"],
+    }).reset_index()
+
+    total = years.sort_values("ultima_data").groupby(KEYS, as_index=False).tail(1)
+    total = total.assign(periodo="total", inicio_casos=0.0, inicio_obitos=0.0)
+    return pd.concat([years, total], ignore_index=True)
+
+
+def update_base(df: pd.DataFrame, base: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Folds the rows newer than the base table into it.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Cleaned dataset (``estado``, ``municipio``, ``data`` and the
+        cumulative columns). It may contain only the new days; rows not
+        newer than the oldest last date of the base are ignored.
+    base : pandas.DataFrame, optional
+        Current base table. If missing, the base is built from ``df``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Updated base table.
+    """
+    if base is None or base.empty:
+        previous = pd.DataFrame(columns=KEYS + ["casosAnterior", "obitosAnterior"])
+        return _period_rows(cumulative_series(df), previous)
+
+    # Rows older than every series in the base can be dropped before the
+    # (sort-heavy) series are built
+    latest = base[base["periodo"] == "total"]
+    series = cumulative_series(df[df["data"] > latest["ultima_data"].min()])
+    previous = latest[KEYS + ["fim_casos", "fim_obitos", "ultima_data"]].rename(
+        columns={"fim_casos": "casosAnterior", "fim_obitos": "obitosAnterior", "ultima_data": "dataAnterior"}
+    )
+
+    # Keep only the days after the last one already folded into each series
+    series = series.merge(previous[KEYS + ["dataAnterior"]], on=KEYS, how="left")
+    series = series[series["dataAnterior"].isna() | (series["data"] > series["dataAnterior"])]
+    series = series.drop(columns="dataAnterior")
+    if series.empty:
+        return base
+
+    new = _period_rows(series, previous.drop(columns="dataAnterior"))
+
+    # New end values replace the old ones; start values are kept once set
+    merged = base.merge(new, on=KEYS + ["periodo"], how="outer", suffixes=("", "_novo"))
+    for col in ["fim_casos", "fim_obitos", "populacao", "ultima_data"]:
+        merged[col] = merged[f"{col}_novo"].where(merged[f"{col}_novo"].notna(), merged[col])
+    for col in ["inicio_casos", "inicio_obitos"]:
+        merged[col] = merged[col].where(merged[col].notna(), merged[f"{col}_novo"])
+    return merged[base.columns].reset_index(drop=True)
+
+
+def build_rankings(base: pd.DataFrame, top_n: int = 20) -> pd.DataFrame:
+    """
+    Top-N municipalities and states per period and metric.
+
+    Parameters
+    ----------
+    base : pandas.DataFrame
+        Base table returned by :func:`update_base`.
+    top_n : int
+        Number of positions kept per (level, period, metric).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columns ``nivel``, ``periodo``, ``metrica``, ``posicao``,
+        ``estado``, ``municipio`` and ``valor``.
+    """
+    values = base[KEYS + ["periodo"]].copy()
+    values["casos"] = base["fim_casos"] - base["inicio_casos"]
+    values["obitos"] = base["fim_obitos"] - base["inicio_obitos"]
+    population = base["populacao"].where(base["populacao"] > 0)
+    values["casos_100k"] = values["casos"] / population * 100_000
+    values["obitos_100k"] = values["obitos"] / population * 100_000
+
+    long = values.melt(id_vars=KEYS + ["periodo"], value_vars=METRICS, var_name="metrica", value_name="valor")
+    long["valor"] = long["valor"].astype("float64")
+    long = long[np.isfinite(long["valor"])]
+    long = long.sort_values(
+        ["nivel", "periodo", "metrica", "valor", "estado", "municipio"],
+        ascending=[True, True, True, False, True, True],
+    )
+    top = long.groupby(["nivel", "periodo", "metrica"], sort=False).head(top_n).copy()
+    top["posicao"] = top.groupby(["nivel", "periodo", "metrica"], sort=False).cumcount() + 1
+    return top[["nivel", "periodo", "metrica", "posicao", "estado", "municipio", "valor"]].reset_index(drop=True)
+
+
+def update_rankings(
+    df: pd.DataFrame,
+    base_path: str,
+    rankings_path: str,
+    top_n: int = 20,
+    rebuild: bool = False,
+) -> pd.DataFrame:
+    """
+    Updates the base table incrementally and rewrites the rankings.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Cleaned dataset (or only its new days).
+    base_path : str
+        Parquet file of the base table.
+    rankings_path : str
+        Parquet file of the rankings table.
+    top_n : int
+        Number of positions kept per ranking.
+    rebuild : bool
+        Ignore the stored base table and rebuild it from ``df``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The rankings table.
+    """
+    base = None
+    if not rebuild and os.path.exists(base_path):
+        base = pd.read_parquet(base_path)
+    mode = "incremental" if base is not None else "full"
+
+    base = update_base(df, base)
+    rankings = build_rankings(base, top_n)
+
+    for path, table in [(base_path, base), (rankings_path, rankings)]:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        table.to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, path)
+
+    print(f"Rankings updated ({mode}, up to {base['ultima_data'].max().date()}): {rankings_path}")
+    return rankings
+
+
+def load_rankings(
+    path: str,
+    nivel: str = None,
+    periodo: str = None,
+    metrica: str = None,
+    n: int = None,
+) -> pd.DataFrame:
+    """
+    Reads the rankings table, optionally filtered.
+
+    Parameters
+    ----------
+    path : str
+        Parquet file written by :func:`update_rankings`.
+    nivel : str, optional
+        ``"municipio"`` or ``"estado"``.
+    periodo : str, optional
+        ``"total"`` or a year (e.g. ``"2021"``).
+    metrica : str, optional
+        One of ``casos``, ``obitos``, ``casos_100k``, ``obitos_100k``.
+    n : int, optional
+        Keep only the first ``n`` positions.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Matching ranking rows ordered by position.
+    """
+    filters = [
+        (col, "==", value)
+        for col, value in [("nivel", nivel), ("periodo", periodo), ("metrica", metrica)]
+        if value is not None
+    ]
+    if n is not None:
+        filters.append(("posicao", "<=", int(n)))
+    rankings = pd.read_parquet(path, filters=filters or None)
+    return rankings.sort_values(["nivel", "periodo", "metrica", "posicao"]).reset_index(drop=True)
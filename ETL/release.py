@@ -0,0 +1,105 @@
+"""
+Versioned releases of the published dataset files.
+
+The files read by the dashboard and the API (consolidated CSV, Parquet,
+Feather cache, rankings and per-date snapshots) are written together into
+a new release directory under ``RELEASES_PATH`` and published by switching
+a single pointer file (``RELEASES_PATH/current``). Readers resolve the
+configured paths with :func:`published_path`, so they see every file of
+the previous release or every file of the new one, never a mix.
+
+Until a release is published the configured paths are used as they are.
+The rankings base table (``RANKINGS_BASE_FILE``) is not part of a release:
+it is internal state of the incremental update, read only by the ETL.
+
+    release_dir = new_release()
+    write(df, **release_outputs(release_dir))
+    publish(release_dir)            # or discard(release_dir) on failure
+"""
+
+import os
+import shutil
+import time
+
+from ETL.export import write_pointer
+from base.config import (
+    CONSOLIDATED_CSV,
+    FEATHER_FILE,
+    PARQUET_FILE,
+    RANKINGS_FILE,
+    RELEASES_PATH,
+    SNAPSHOT_ESTADOS_FILE,
+    SNAPSHOT_MUNICIPIOS_FILE,
+)
+
+# Published files: argument of ETL.pipeline.write → configured path
+PUBLISHED_FILES = {
+    "csv_path": CONSOLIDATED_CSV,
+    "parquet_path": PARQUET_FILE,
+    "feather_path": FEATHER_FILE,
+    "rankings_path": RANKINGS_FILE,
+    "snapshot_states_path": SNAPSHOT_ESTADOS_FILE,
+    "snapshot_municipalities_path": SNAPSHOT_MUNICIPIOS_FILE,
+}
+
+
+def _pointer(root: str) -> str:
+    return os.path.join(root, "current")
+
+
+def new_release(root: str = RELEASES_PATH) -> str:
+    """Creates an empty release directory (not published yet) and returns it."""
+    path = os.path.join(root, f"r{time.time_ns()}")
+    os.makedirs(path)
+    return path
+
+
+def release_outputs(release_dir: str) -> dict:
+    """Arguments of :func:`ETL.pipeline.write` that write into ``release_dir``."""
+    return {name: os.path.join(release_dir, os.path.basename(path)) for name, path in PUBLISHED_FILES.items()}
+
+
+def current_release(root: str = RELEASES_PATH) -> str:
+    """Directory of the published release, or None if none was published."""
+    try:
+        with open(_pointer(root), encoding="utf-8") as f:
+            return os.path.join(root, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def published_path(path: str, root: str = RELEASES_PATH) -> str:
+    """
+    Published version of the configured file ``path``.
+
+    The file of the same name in the current release, or ``path`` itself
+    while no release has been published.
+    """
+    release = current_release(root)
+    return os.path.join(release, os.path.basename(path)) if release else path
+
+
+def publish(release_dir: str, root: str = RELEASES_PATH):
+    """
+    Makes ``release_dir`` the current release with one atomic pointer switch.
+
+    The previous release is kept for readers that resolved the pointer just
+    before the switch; older ones are deleted (files still mapped by a
+    reader on Windows are left for a later publish). Releases created after
+    ``release_dir`` belong to runs still in progress and are kept.
+    """
+    previous = current_release(root)
+    name = os.path.basename(release_dir)
+    write_pointer(_pointer(root), name)
+    print(f"Release published: {release_dir}")
+
+    keep = {name, os.path.basename(previous or "")}
+    for old in os.listdir(root):
+        candidate = os.path.join(root, old)
+        if old < name and old not in keep and os.path.isdir(candidate):
+            shutil.rmtree(candidate, ignore_errors=True)
+
+
+def discard(release_dir: str):
+    """Deletes a release that was not published (e.g. after a failed run)."""
+    shutil.rmtree(release_dir, ignore_errors=True)
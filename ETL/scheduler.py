@@ -0,0 +1,323 @@
+"""
+Background refresh of the COVID-19 data: fetch → ETL → SQL load.
+
+A refresh runs the whole chain on the most recent input ZIP:
+
+1. fetch   - optional collection step (``REFRESH_FETCH``, a
+             ``module:function`` callable, e.g. a download of the new ZIP
+             or the Django task);
+2. ETL     - all pipeline stages (:func:`ETL.pipeline.run_pipeline`); the
+             write stage writes every published file into a new, not yet
+             published, release directory (see :mod:`ETL.release`);
+3. load    - SQL load into a shadow table swapped in atomically
+             (``save_to_sql(df, atomic=True)``);
+4. publish - one pointer switch makes the new release current.
+
+While a refresh runs, readers keep seeing the previous release and the
+previous SQL table. If any step fails, the new release is discarded and
+nothing readers see changes. The SQL swap and the pointer switch are two
+separate atomic steps run back to back, so the only moment the files and
+the table can differ is between them.
+
+Only one refresh runs at a time. The job lock is an OS file lock on
+``REFRESH_LOCK_FILE``, shared with ``main.py``, so a manual run and the
+scheduler never overlap, and the lock is released if the process dies.
+A refresh is skipped when the input ZIP did not change since the last
+successful one (use ``force`` to run anyway).
+
+:class:`RefreshScheduler` runs the refresh in a daemon thread on a fixed
+cadence, so it can be started inside a long-running process (API or
+dashboard) without blocking requests, or on its own:
+
+    python -m ETL.scheduler                    # every REFRESH_INTERVAL_HOURS
+    python -m ETL.scheduler --once --force     # single refresh, then exit
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ETL.metrics import StageMetrics
+from ETL.pipeline import find_latest_zip, run_pipeline
+from ETL.release import discard, new_release, publish
+from base.config import (
+    METRICS_FILE,
+    REFRESH_FETCH,
+    REFRESH_INTERVAL_HOURS,
+    REFRESH_LOCK_FILE,
+    REFRESH_STATE_FILE,
+    RELEASES_PATH,
+)
+from py.save_to_sql import save_to_sql
+
+
+class RefreshInProgress(RuntimeError):
+    """Raised when another process or thread holds the refresh lock."""
+
+
+@contextmanager
+def job_lock(path: str = REFRESH_LOCK_FILE):
+    """
+    Holds an exclusive, non-blocking lock on ``path`` while the block runs.
+
+    Raises
+    ------
+    RefreshInProgress
+        If the lock is already held.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    handle = open(path, "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        handle.close()
+        raise RefreshInProgress(f"Another refresh is running (lock: {path}).") from None
+
+    try:
+        # Owner information, only for diagnostics
+        handle.seek(0)
+        handle.truncate()
+        handle.write(f"{os.getpid()} {datetime.now().isoformat(timespec='seconds')}\n")
+        handle.flush()
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        handle.close()
+
+
+def load_callable(spec: str):
+    """Resolves a ``"module:function"`` string to the function."""
+    module, _, name = spec.partition(":")
+    if not name:
+        raise ValueError(f"Invalid fetch callable: {spec!r}. Use 'module:function'.")
+    return getattr(importlib.import_module(module), name)
+
+
+def _zip_signature(zip_path: str) -> dict:
+    stat = os.stat(zip_path)
+    return {"zip": os.path.abspath(zip_path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _read_state(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_state(path: str, state: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def refresh(
+    zip_path: str = None,
+    fetch=None,
+    force: bool = False,
+    metrics: StageMetrics = None,
+    state_path: str = REFRESH_STATE_FILE,
+    releases_path: str = RELEASES_PATH,
+) -> bool:
+    """
+    Runs fetch → ETL → load → publish once. The caller must hold the job lock.
+
+    On failure the new release is discarded, readers keep the previous
+    data, and the input is not recorded as refreshed, so the next run
+    retries it even if the ZIP did not change.
+
+    Parameters
+    ----------
+    zip_path : str, optional
+        Input ZIP. Defaults to the most recent ZIP in the input directory,
+        looked up after the fetch step.
+    fetch : callable, optional
+        Collection step run before the ETL.
+    force : bool
+        Run even if the input ZIP did not change since the last refresh.
+    metrics : StageMetrics, optional
+        Collector of the stage metrics.
+    state_path : str
+        JSON file with the input of the last successful refresh.
+    releases_path : str
+        Directory of the releases (see :mod:`ETL.release`).
+
+    Returns
+    -------
+    bool
+        True if the data was refreshed, False if it was already up to date.
+    """
+    metrics = metrics if metrics is not None else StageMetrics()
+
+    if fetch is not None:
+        with metrics.stage("fetch"):
+            fetch()
+
+    zip_path = zip_path or find_latest_zip()
+    signature = _zip_signature(zip_path)
+    if not force and _read_state(state_path).get("input") == signature:
+        print(f"Input unchanged since the last refresh ({zip_path}); skipping.")
+        return False
+
+    release_dir = new_release(releases_path)
+    try:
+        df = run_pipeline(zip_path=zip_path, metrics=metrics, release_dir=release_dir, publish_release=False)
+        with metrics.stage("load", rows_in=len(df)) as record:
+            save_to_sql(df, atomic=True)
+            record["rows_out"] = len(df)
+    except BaseException:
+        discard(release_dir)
+        raise
+
+    with metrics.stage("publish"):
+        publish(release_dir, releases_path)
+
+    _write_state(state_path, {
+        "input": signature,
+        "rows": len(df),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    return True
+
+
+class RefreshScheduler:
+    """
+    Runs :func:`refresh` on a fixed cadence in a background daemon thread.
+
+    Parameters
+    ----------
+    interval_hours : float
+        Time between the start of two refresh attempts.
+    zip_path : str, optional
+        Fixed input ZIP (default: most recent ZIP at each run).
+    fetch : callable, optional
+        Collection step run before the ETL.
+    lock_path : str
+        File of the job lock.
+    metrics_path : str, optional
+        JSON lines file that receives the metrics of each refresh.
+    """
+
+    def __init__(
+        self,
+        interval_hours: float = REFRESH_INTERVAL_HOURS,
+        zip_path: str = None,
+        fetch=None,
+        lock_path: str = REFRESH_LOCK_FILE,
+        metrics_path: str = METRICS_FILE,
+    ):
+        self.interval = interval_hours * 3600
+        self.zip_path = zip_path
+        self.fetch = fetch
+        self.lock_path = lock_path
+        self.metrics_path = metrics_path
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def run_once(self, force: bool = False) -> bool:
+        """
+        Runs a refresh now, in the calling thread.
+
+        Returns False, keeping the current data, when another refresh holds
+        the lock or when the refresh fails.
+        """
+        metrics = StageMetrics()
+        try:
+            with job_lock(self.lock_path):
+                return refresh(self.zip_path, self.fetch, force=force, metrics=metrics)
+        except RefreshInProgress as exc:
+            print(f"Refresh skipped: {exc}")
+            return False
+        except Exception as exc:  # keep the scheduler alive; previous data stays in place
+            print(f"Refresh failed ({type(exc).__name__}: {exc}); keeping the previous data.")
+            return False
+        finally:
+            if self.metrics_path and metrics.records:
+                metrics.write_json(self.metrics_path)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.run_once()
+            # Wait for the next slot, unless stopped or triggered earlier
+            self._wake.wait(max(self.interval - (time.monotonic() - started), 0))
+            self._wake.clear()
+
+    def start(self) -> "RefreshScheduler":
+        """Starts the background thread (the first refresh runs immediately)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="covid-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def is_alive(self) -> bool:
+        """Whether the background thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def trigger(self):
+        """Requests a refresh without waiting for the next slot."""
+        self._wake.set()
+
+    def stop(self, timeout: float = None):
+        """Stops the scheduler after the current refresh, if any."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def main(argv: list = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Scheduled refresh of the COVID-19 data (fetch → ETL → load).")
+    parser.add_argument("--interval-hours", type=float, default=REFRESH_INTERVAL_HOURS, help="Time between refreshes.")
+    parser.add_argument("--zip", dest="zip_path", help="Input ZIP (default: most recent in input/).")
+    parser.add_argument("--fetch", default=REFRESH_FETCH, help="Collection step as 'module:function'.")
+    parser.add_argument("--once", action="store_true", help="Run a single refresh and exit.")
+    parser.add_argument("--force", action="store_true", help="Refresh even if the input did not change.")
+    args = parser.parse_args(argv)
+
+    fetch = load_callable(args.fetch) if args.fetch else None
+    scheduler = RefreshScheduler(args.interval_hours, args.zip_path, fetch)
+    if args.once:
+        scheduler.run_once(force=args.force)
+        return
+
+    if args.force:
+        scheduler.run_once(force=True)
+    scheduler.start()
+    print(f"Refresh scheduler running every {args.interval_hours:g} h (Ctrl+C to stop).")
+    try:
+        while scheduler.is_alive():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Per-date snapshot tables for choropleth maps of the COVID-19 dashboard.
+
+Two compact Parquet tables are written, sorted by date:
+- states: ``data``, ``estado``, cumulative cases/deaths, population
+  (float, empty when unknown) and cases/deaths per 100k inhabitants;
+- municipalities: the same columns keyed by ``codmun`` (6-digit IBGE code,
+  as published by the Ministry of Health), plus ``estado`` and
+  ``municipio``. The per-state series of cases not attributed to a
+  municipality (``codmun`` = state code followed by ``0000``) is kept as a
+  row of its own, without population, so its rates are empty.
+
+Each row group holds whole days (``days_per_row_group`` of them), so the
+row group statistics work as a date index: :func:`load_snapshot` reads
+only the row group of the requested date, and a date slider loads one
+small slice per interaction instead of grouping the full dataset.
+
+Values come from the official cumulative columns, like the rankings
+(:mod:`ETL.rankings`), so they match the published totals.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ETL.rankings import cumulative_series
+
+METRICS = ["casosAcumulado", "obitosAcumulado", "casos_100k", "obitos_100k"]
+
+
+def _with_rates(series: pd.DataFrame) -> pd.DataFrame:
+    """Adds the cumulative cases/deaths per 100k inhabitants."""
+    population = series["populacaoTCU2019"].where(series["populacaoTCU2019"] > 0)
+    series["casos_100k"] = (series["casosAcumulado"] / population * 100_000).astype("float32")
+    series["obitos_100k"] = (series["obitosAcumulado"] / population * 100_000).astype("float32")
+    return series
+
+
+def _check_unique(table: pd.DataFrame, keys: list, name: str):
+    """Raises ValueError if ``keys`` do not identify the rows of ``table``."""
+    duplicated = table.duplicated(keys)
+    if duplicated.any():
+        sample = table.loc[duplicated, keys].head(3).to_dict("records")
+        raise ValueError(f"Duplicated {name} snapshot rows for {', '.join(keys)}: {sample}")
+
+
+def build_snapshots(df: pd.DataFrame) -> tuple:
+    """
+    Builds the per-date snapshot tables by state and by municipality.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Cleaned dataset. Without the ``codmun`` column (e.g. checkpoints of
+        older runs), the municipality table is not built.
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        State table and municipality table (``None`` without ``codmun``).
+
+    Raises
+    ------
+    ValueError
+        If a state (or municipality) has more than one row on a date.
+    """
+    has_codmun = "codmun" in df.columns
+    series = cumulative_series(df, ["codmun"] if has_codmun else [], include_unknown=True)
+    values = ["casosAcumulado", "obitosAcumulado", "populacaoTCU2019"]
+    for col in ["casosAcumulado", "obitosAcumulado"]:
+        series[col] = series[col].astype("int64")
+    # Float, as in the rankings: the cleaning fills missing populations with
+    # the state median (possibly fractional) and a state may have none
+    series["populacaoTCU2019"] = series["populacaoTCU2019"].astype("float64")
+    series = _with_rates(series)
+
+    states = series[series["nivel"] == "estado"]
+    states = states[["data", "estado", *values, "casos_100k", "obitos_100k"]]
+    states = states.astype({"estado": "category"}).sort_values(["data", "estado"], kind="stable")
+    _check_unique(states, ["data", "estado"], "state")
+
+    municipalities = None
+    if has_codmun:
+        municipalities = series[(series["nivel"] == "municipio") & series["codmun"].notna()]
+        municipalities = municipalities[
+            ["data", "codmun", "estado", "municipio", *values, "casos_100k", "obitos_100k"]
+        ]
+        municipalities = municipalities.astype({"codmun": "int32", "estado": "category", "municipio": "category"})
+        municipalities = municipalities.sort_values(["data", "codmun"], kind="stable")
+        _check_unique(municipalities, ["data", "codmun"], "municipality")
+
+    return states.reset_index(drop=True), (
+        municipalities.reset_index(drop=True) if municipalities is not None else None
+    )
+
+
+def write_snapshot(df: pd.DataFrame, path: str, days_per_row_group: int = 7) -> int:
+    """
+    Writes a snapshot table with row groups aligned to whole days.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Table returned by :func:`build_snapshots`, sorted by date.
+    path : str
+        Destination Parquet file (written to a temporary name and renamed).
+    days_per_row_group : int
+        Days stored in each row group.
+
+    Returns
+    -------
+    int
+        Number of row groups written.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # First row of each day, then of each block of days
+    dates = df["data"].to_numpy()
+    day_starts = np.concatenate([[0], np.flatnonzero(dates[1:] != dates[:-1]) + 1])
+    bounds = day_starts[::days_per_row_group].tolist() + [len(df)]
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with pq.ParquetWriter(tmp_path, table.schema, compression="snappy") as writer:
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            writer.write_table(table.slice(start, end - start), row_group_size=end - start)
+    os.replace(tmp_path, path)
+    return len(bounds) - 1
+
+
+def update_snapshots(
+    df: pd.DataFrame,
+    states_path: str,
+    municipalities_path: str,
+    days_per_row_group: int = 7,
+) -> tuple:
+    """
+    Builds and writes both snapshot tables.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Cleaned dataset.
+    states_path, municipalities_path : str
+        Destination Parquet files.
+    days_per_row_group : int
+        Days stored in each row group.
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        State and municipality tables (see :func:`build_snapshots`).
+    """
+    states, municipalities = build_snapshots(df)
+    write_snapshot(states, states_path, days_per_row_group)
+    print(f"State snapshots saved to: {states_path} ({len(states):,} rows)")
+
+    if municipalities is None:
+        print("Municipality snapshots skipped: dataset without 'codmun' (rerun from the clean stage).")
+    else:
+        write_snapshot(municipalities, municipalities_path, days_per_row_group)
+        print(f"Municipality snapshots saved to: {municipalities_path} ({len(municipalities):,} rows)")
+    return states, municipalities
+
+
+def snapshot_dates(path: str) -> list:
+    """Dates available in a snapshot table, in ascending order."""
+    dates = pq.read_table(path, columns=["data"]).column("data").unique()
+    return sorted(pd.Timestamp(d) for d in dates.to_pylist())
+
+
+def load_snapshot(path: str, date, columns: list = None, estados: list = None) -> pd.DataFrame:
+    """
+    Reads the snapshot of a single date.
+
+    Only the row group that contains ``date`` is read from disk.
+
+    Parameters
+    ----------
+    path : str
+        Snapshot table written by :func:`update_snapshots`.
+    date : str or datetime-like
+        Day of the snapshot.
+    columns : list of str, optional
+        Columns to read (default: all).
+    estados : list of str, optional
+        Keep only these states.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per state or municipality.
+    """
+    filters = [("data", "==", pd.Timestamp(date))]
+    if estados:
+        filters.append(("estado", "in", list(estados)))
+    return pd.read_parquet(path, columns=columns, filters=filters).reset_index(drop=True)
@@ -0,0 +1,145 @@
+"""
+Agregações utilizadas pelas abas do painel COVID-19.
+
+Funções puras sobre o DataFrame consolidado, separadas do Streamlit para
+que possam ser reutilizadas e medidas pelos benchmarks. As colunas de texto
+podem ser categóricas (cache Feather), por isso os agrupamentos usam
+``observed=True``.
+"""
+
+import pandas as pd
+
+# Nome das linhas agregadas (estado/Brasil) após a limpeza do ETL
+MUNICIPIO_AGREGADO = "Not informed"
+
+# Colunas carregadas pelo painel a partir do cache Feather
+COLUNAS_PAINEL = [
+    "data", "regiao", "estado", "municipio", "populacaoTCU2019",
+    "casosAcumulado", "casosNovos", "obitosAcumulado", "obitosNovos",
+]
+
+# Estados de cada região do Brasil
+REGIOES = {
+    "Norte": ["AC", "AM", "AP", "PA", "RO", "RR", "TO"],
+    "Nordeste": ["AL", "BA", "CE", "MA", "PB", "PE", "PI", "RN", "SE"],
+    "Centro-Oeste": ["DF", "GO", "MT", "MS"],
+    "Sudeste": ["ES", "MG", "RJ", "SP"],
+    "Sul": ["PR", "RS", "SC"],
+}
+
+
+def serie_nacional(df: pd.DataFrame) -> pd.DataFrame:
+    """Casos e óbitos diários do Brasil com médias móveis de 7 dias."""
+    df_brasil = (
+        df.groupby("data")[["casosNovos", "obitosNovos"]]
+        .sum()
+        .reset_index()
+        .sort_values("data")
+    )
+    df_brasil["casosMM7"] = df_brasil["casosNovos"].rolling(7, min_periods=1).mean()
+    df_brasil["obitosMM7"] = df_brasil["obitosNovos"].rolling(7, min_periods=1).mean()
+    return df_brasil
+
+
+def serie_municipio(df: pd.DataFrame, estado: str, municipio: str) -> pd.DataFrame:
+    """Série diária de um município com médias móveis de 7 e 30 dias."""
+    df_mun = df[
+        (df["estado"] == estado) & (df["municipio"] == municipio)
+    ].copy().sort_values("data")
+
+    df_mun["casosMM7"] = df_mun["casosNovos"].rolling(7, min_periods=1).mean()
+    df_mun["casosMM30"] = df_mun["casosNovos"].rolling(30, min_periods=1).mean()
+    df_mun["obitosMM7"] = df_mun["obitosNovos"].rolling(7, min_periods=1).mean()
+    df_mun["obitosMM30"] = df_mun["obitosNovos"].rolling(30, min_periods=1).mean()
+    return df_mun
+
+
+def totais_por_regiao(df: pd.DataFrame) -> pd.DataFrame:
+    """Casos e óbitos totais por região (usa a coluna ``regiao`` se existir)."""
+    if "regiao" in df.columns:
+        regiao = df["regiao"]
+    else:
+        estado_regiao = {uf: regiao for regiao, ufs in REGIOES.items() for uf in ufs}
+        regiao = df["estado"].map(estado_regiao).fillna("Desconhecida")
+
+    return (
+        df.groupby(regiao.rename("regiao"), observed=True)[["casosNovos", "obitosNovos"]]
+        .sum()
+        .sort_values("casosNovos", ascending=False)
+        .reset_index()
+    )
+
+
+def _rotulo_municipio(estado: str, municipio: str) -> str:
+    """Rótulo que distingue municípios homônimos de estados diferentes."""
+    return f"{municipio} ({estado})"
+
+
+def top_municipios(df: pd.DataFrame, n: int = 10) -> pd.Series:
+    """
+    Municípios com mais casos acumulados (ordem crescente, para barras horizontais).
+
+    Agrupa por (estado, municipio) e ignora as linhas agregadas de estado e
+    do Brasil. Usado quando a tabela de rankings do ETL não está disponível.
+    """
+    top = (
+        df[df["municipio"] != MUNICIPIO_AGREGADO]
+        .groupby(["estado", "municipio"], observed=True)["casosAcumulado"]
+        .max()
+        .sort_values(ascending=False)
+        .head(n)
+        .sort_values(ascending=True)
+    )
+    top.index = [_rotulo_municipio(uf, mun) for uf, mun in top.index]
+    return top
+
+
+def serie_ranking(
+    rankings: pd.DataFrame,
+    nivel: str,
+    periodo: str,
+    metrica: str,
+    n: int = 10,
+) -> pd.Series:
+    """
+    Valores de um ranking pré-calculado pelo ETL (``ETL.rankings``).
+
+    Retorna uma série indexada pelo estado ou pelo rótulo do município, na
+    ordem das posições do ranking.
+    """
+    top = rankings[
+        (rankings["nivel"] == nivel)
+        & (rankings["periodo"] == periodo)
+        & (rankings["metrica"] == metrica)
+        & (rankings["posicao"] <= n)
+    ].sort_values("posicao")
+
+    if nivel == "municipio":
+        index = [_rotulo_municipio(uf, mun) for uf, mun in zip(top["estado"], top["municipio"])]
+    else:
+        index = top["estado"].tolist()
+    return pd.Series(top["valor"].to_numpy(), index=index, name=metrica)
+
+
+def top_estados_obitos(df: pd.DataFrame, n: int = 10) -> pd.DataFrame:
+    """Estados com mais óbitos acumulados e sua taxa por 100 mil habitantes."""
+    return (
+        df.groupby("estado", observed=True)[["obitosAcumulado", "populacaoTCU2019"]]
+        .max()
+        .assign(
+            taxa=lambda d: (d["obitosAcumulado"] / d["populacaoTCU2019"]) * 100000
+        )
+        .sort_values("obitosAcumulado", ascending=False)
+        .head(n)
+    )
+
+
+def mortalidade_por_estado(df: pd.DataFrame) -> pd.DataFrame:
+    """Taxa de mortalidade (% da população de 2019) por estado."""
+    return (
+        df.groupby("estado", observed=True)[["obitosAcumulado", "populacaoTCU2019"]]
+        .max()
+        .assign(taxa_mortalidade=lambda d: (d["obitosAcumulado"] / d["populacaoTCU2019"]) * 100)
+        .sort_values("taxa_mortalidade", ascending=False)
+        .reset_index()
+    )
@@ -1,4 +1,5 @@
 import os
+import sys
 import pandas as pd
 import numpy as np
 import streamlit as st
@@ -7,6 +8,32 @@ import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from scipy.signal import find_peaks
 
+# Permite importar módulos do projeto ao executar via `streamlit run`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ETL.export import feather_version, open_feather, output_path, read_csv
+from ETL.rankings import load_rankings
+from ETL.release import published_path
+from ETL.snapshots import load_snapshot, snapshot_dates
+from base.config import (
+    CONSOLIDATED_CSV,
+    CSV_COMPRESSION,
+    FEATHER_FILE,
+    RANKINGS_FILE,
+    SNAPSHOT_ESTADOS_FILE,
+    SNAPSHOT_MUNICIPIOS_FILE,
+)
+from app.aggregations import (
+    COLUNAS_PAINEL,
+    mortalidade_por_estado,
+    serie_municipio,
+    serie_nacional,
+    serie_ranking,
+    top_estados_obitos,
+    top_municipios,
+    totais_por_regiao,
+)
+
 # ==============================================================
 # 1. Configuração inicial
 # ==============================================================
@@ -27,18 +54,65 @@ st.markdown(
 # 2. Carregamento do dataset consolidado
 # ==============================================================
 
-@st.cache_data
-def load_data():
-    csv_path = (
-        r"C:\Users\rafae.RAFAEL_NOTEBOOK\Downloads\covid19_SP"
-        r"\SaS_Cov19_project\output\COVIDBR\COVIDBR_2020_2025_Consolidado.csv"
-    )
-    df = pd.read_csv(csv_path, sep=";", encoding="utf-8", low_memory=False)
+# Arquivos da versão publicada pelo ETL (ver ETL.release), resolvidos a cada
+# execução do script: uma atualização troca todos eles de uma só vez
+ARQUIVO_FEATHER = published_path(FEATHER_FILE)
+ARQUIVO_CSV = published_path(output_path(CONSOLIDATED_CSV, CSV_COMPRESSION))
+ARQUIVO_RANKINGS = published_path(RANKINGS_FILE)
+RETRATO_ESTADOS = published_path(SNAPSHOT_ESTADOS_FILE)
+RETRATO_MUNICIPIOS = published_path(SNAPSHOT_MUNICIPIOS_FILE)
+
+
+@st.cache_resource(max_entries=1)
+def load_data(versao=None):
+    """
+    Abre o cache Feather gerado pelo ETL com memory mapping.
+
+    As colunas numéricas são views somente leitura sobre o arquivo mapeado
+    (sem cópia), então várias réplicas do painel no mesmo host compartilham
+    a mesma cópia em page cache. ``st.cache_resource`` mantém um único
+    DataFrame por processo, sem a cópia feita a cada acesso por
+    ``st.cache_data``. Sem o cache Feather, lê o CSV consolidado.
+
+    ``versao`` (arquivo da versão atual do cache, ver
+    ``ETL.export.feather_version``) faz o painel abrir a nova versão
+    publicada pela atualização agendada, descartando a anterior.
+    """
+    if versao:
+        table = open_feather(versao)
+        colunas = [c for c in COLUNAS_PAINEL if c in table.column_names]
+        return table.select(colunas).to_pandas(split_blocks=True)
+
+    df = read_csv(ARQUIVO_CSV, encoding="utf-8", low_memory=False)
     df["data"] = pd.to_datetime(df["data"], errors="coerce")
-    df = df[(df["casosNovos"] >= 0) & (df["obitosNovos"] >= 0)]
+    # Correções retroativas e outliers já são tratados na etapa de qualidade do ETL
     return df
 
-df = load_data()
+df = load_data(feather_version(ARQUIVO_FEATHER))
+
+
+@st.cache_data
+def carregar_rankings(versao):
+    """Tabela de rankings pré-calculada pelo ETL (``versao`` invalida o cache)."""
+    return load_rankings(ARQUIVO_RANKINGS)
+
+
+rankings = (
+    carregar_rankings(os.path.getmtime(ARQUIVO_RANKINGS))
+    if os.path.exists(ARQUIVO_RANKINGS) else None
+)
+
+
+@st.cache_data
+def datas_retrato(versao):
+    """Datas disponíveis nos retratos diários (``versao`` invalida o cache)."""
+    return snapshot_dates(RETRATO_ESTADOS)
+
+
+@st.cache_data(max_entries=64)
+def carregar_retrato(caminho, data, versao):
+    """Retrato de uma única data; lê apenas o row group correspondente."""
+    return load_snapshot(caminho, data)
 
 # ==============================================================
 # 3. Estrutura de abas
@@ -49,7 +123,8 @@ tabs = st.tabs([
     "🏙️ Município de São Paulo",
     "🗺️ Regiões do Brasil",
     "📊 Top Municípios e Estados",
-    "⚰️ Taxa de Mortalidade"
+    "⚰️ Taxa de Mortalidade",
+    "🗓️ Retrato por Data"
 ])
 
 # ==============================================================
@@ -59,14 +134,7 @@ tabs = st.tabs([
 with tabs[0]:
     st.subheader("Evolução da COVID-19 no Brasil — Casos × Óbitos (MM 7 dias)")
 
-    df_brasil = (
-        df.groupby("data")[["casosNovos", "obitosNovos"]]
-        .sum()
-        .reset_index()
-        .sort_values("data")
-    )
-    df_brasil["casosMM7"] = df_brasil["casosNovos"].rolling(7, min_periods=1).mean()
-    df_brasil["obitosMM7"] = df_brasil["obitosNovos"].rolling(7, min_periods=1).mean()
+    df_brasil = serie_nacional(df)
 
     fig, ax1 = plt.subplots(figsize=(12, 6))
     ax1.plot(df_brasil["data"], df_brasil["casosMM7"], color="tab:blue", linewidth=2)
@@ -93,15 +161,7 @@ with tabs[0]:
 with tabs[1]:
     st.subheader("Município de São Paulo — Casos × Óbitos (MM 7 e 30 dias)")
 
-    df_sp = df[df["municipio"] == "São Paulo"].copy().sort_values("data")
-    df_sp = df_sp[
-        (df_sp["casosNovos"] < 10000) & (df_sp["obitosNovos"] < 500)
-    ]
-
-    df_sp["casosMM7"] = df_sp["casosNovos"].rolling(7, min_periods=1).mean()
-    df_sp["casosMM30"] = df_sp["casosNovos"].rolling(30, min_periods=1).mean()
-    df_sp["obitosMM7"] = df_sp["obitosNovos"].rolling(7, min_periods=1).mean()
-    df_sp["obitosMM30"] = df_sp["obitosNovos"].rolling(30, min_periods=1).mean()
+    df_sp = serie_municipio(df, "SP", "São Paulo")
 
     fig, ax1 = plt.subplots(figsize=(12, 6))
     ax1.plot(df_sp["data"], df_sp["casosMM7"], color="#1565C0", linewidth=2, label="Casos MM7")
@@ -122,29 +182,7 @@ with tabs[1]:
 with tabs[2]:
     st.subheader("Casos e Óbitos Totais por Região")
 
-    if "regiao" not in df.columns:
-        mapping = {
-            "Norte": ["AC", "AM", "AP", "PA", "RO", "RR", "TO"],
-            "Nordeste": ["AL", "BA", "CE", "MA", "PB", "PE", "PI", "RN", "SE"],
-            "Centro-Oeste": ["DF", "GO", "MT", "MS"],
-            "Sudeste": ["ES", "MG", "RJ", "SP"],
-            "Sul": ["PR", "RS", "SC"],
-        }
-
-        def get_region(uf):
-            for region, states in mapping.items():
-                if uf in states:
-                    return region
-            return "Desconhecida"
-
-        df["regiao"] = df["estado"].apply(get_region)
-
-    df_region = (
-        df.groupby("regiao")[["casosNovos", "obitosNovos"]]
-        .sum()
-        .sort_values("casosNovos", ascending=False)
-        .reset_index()
-    )
+    df_region = totais_por_regiao(df)
 
     df_melt = df_region.melt(id_vars="regiao", var_name="Indicador", value_name="Total")
 
@@ -163,16 +201,18 @@ with tabs[2]:
 with tabs[3]:
     st.subheader("Top 10 Municípios e Estados com Mais Casos")
 
+    # Rankings pré-calculados pelo ETL; sem eles, agrega o dataset completo
+    if rankings is not None:
+        periodos = sorted(rankings["periodo"].unique(), key=lambda p: (p != "total", p))
+        periodo = st.selectbox("Período", periodos)
+
     col1, col2 = st.columns(2)
 
     with col1:
-        top_cities = (
-            df.groupby("municipio")["casosAcumulado"]
-            .max()
-            .sort_values(ascending=False)
-            .head(10)
-            .sort_values(ascending=True)
-        )
+        if rankings is not None:
+            top_cities = serie_ranking(rankings, "municipio", periodo, "casos", 10).iloc[::-1]
+        else:
+            top_cities = top_municipios(df, 10)
         fig1, ax = plt.subplots(figsize=(8, 5))
         bars = ax.barh(top_cities.index, top_cities.values, color="royalblue", alpha=0.85)
         for bar in bars:
@@ -183,15 +223,10 @@ with tabs[3]:
         st.pyplot(fig1)
 
     with col2:
-        df_est = (
-            df.groupby("estado")[["obitosAcumulado", "populacaoTCU2019"]]
-            .max()
-            .assign(
-                taxa=lambda d: (d["obitosAcumulado"] / d["populacaoTCU2019"]) * 100000
-            )
-            .sort_values("obitosAcumulado", ascending=False)
-            .head(10)
-        )
+        if rankings is not None:
+            df_est = serie_ranking(rankings, "estado", periodo, "obitos", 10).to_frame("obitosAcumulado")
+        else:
+            df_est = top_estados_obitos(df, 10)
         fig2, ax = plt.subplots(figsize=(8, 5))
         sns.barplot(data=df_est, x=df_est.index, y="obitosAcumulado",
                     palette="Reds_r", ax=ax)
@@ -206,13 +241,7 @@ with tabs[3]:
 with tabs[4]:
     st.subheader("Taxa de Mortalidade — Percentual da População de 2019")
 
-    df_mort = (
-        df.groupby("estado")[["obitosAcumulado", "populacaoTCU2019"]]
-        .max()
-        .assign(taxa_mortalidade=lambda d: (d["obitosAcumulado"] / d["populacaoTCU2019"]) * 100)
-        .sort_values("taxa_mortalidade", ascending=False)
-        .reset_index()
-    )
+    df_mort = mortalidade_por_estado(df)
 
     media_nac = df_mort["taxa_mortalidade"].mean()
 
@@ -226,6 +255,52 @@ with tabs[4]:
     plt.xticks(rotation=45)
     st.pyplot(fig)
 
+# ==============================================================
+# 9. Aba 6 – Retrato por Data
+# ==============================================================
+
+with tabs[5]:
+    st.subheader("Retrato Acumulado por Estado e Município em uma Data")
+
+    if not os.path.exists(RETRATO_ESTADOS):
+        st.info("Retratos diários ainda não gerados: execute a etapa de escrita do ETL.")
+    else:
+        # Tabelas por estado/codmun prontas para mapas coropléticos; cada
+        # posição do seletor de data carrega apenas o retrato daquele dia
+        versao = os.path.getmtime(RETRATO_ESTADOS)
+        datas = datas_retrato(versao)
+        data = st.select_slider(
+            "Data", options=datas, value=datas[-1],
+            format_func=lambda d: d.strftime("%d/%m/%Y"),
+        )
+        metrica = st.selectbox(
+            "Indicador", ["casos_100k", "obitos_100k", "casosAcumulado", "obitosAcumulado"],
+            format_func={
+                "casos_100k": "Casos por 100 mil hab.",
+                "obitos_100k": "Óbitos por 100 mil hab.",
+                "casosAcumulado": "Casos acumulados",
+                "obitosAcumulado": "Óbitos acumulados",
+            }.get,
+        )
+
+        df_uf = carregar_retrato(RETRATO_ESTADOS, data, versao).sort_values(metrica, ascending=False)
+
+        fig, ax = plt.subplots(figsize=(12, 5))
+        sns.barplot(data=df_uf, x="estado", y=metrica, palette="Reds_r", ax=ax)
+        ax.set_title(f"{metrica} por Estado em {data:%d/%m/%Y}", fontsize=13, weight="bold")
+        plt.xticks(rotation=45)
+        st.pyplot(fig)
+
+        if os.path.exists(RETRATO_MUNICIPIOS):
+            df_mun = carregar_retrato(
+                RETRATO_MUNICIPIOS, data, os.path.getmtime(RETRATO_MUNICIPIOS)
+            )
+            st.markdown("**Municípios com maiores valores na data**")
+            st.dataframe(
+                df_mun.nlargest(15, metrica)[["codmun", "municipio", "estado", metrica]],
+                hide_index=True,
+            )
+
 # ==============================================================
 # Rodapé
 # ==============================================================
@@ -13,7 +13,11 @@ import os
 # Diretório base do projeto
 # ============================================
 
-BASE_DIR = r"C:\Users\rafae.RAFAEL_NOTEBOOK\Downloads\covid19_SP\SaS_Cov19_project"
+# Pode ser sobrescrito pela variável de ambiente COVID_BASE_DIR
+BASE_DIR = os.environ.get(
+    "COVID_BASE_DIR",
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+)
 
 # ============================================
 # Caminhos principais
@@ -25,6 +29,15 @@ DATA_PATH = os.path.join(BASE_DIR, "data")
 # Diretório de saída utilizado para arquivos processados
 OUTPUT_PATH = os.path.join(BASE_DIR, "output")
 
+# Diretório de entrada com os arquivos ZIP baixados do OpenDataSUS
+INPUT_PATH = os.path.join(BASE_DIR, "input")
+
+# Diretório onde os CSVs semestrais são extraídos
+EXTRACT_PATH = os.path.join(OUTPUT_PATH, "COVIDBR")
+
+# Diretório dos checkpoints intermediários de cada etapa do pipeline
+CHECKPOINT_PATH = os.path.join(OUTPUT_PATH, "stages")
+
 # Caminho completo do banco de dados local (SQLite)
 DB_PATH = os.path.join(DATA_PATH, "covid19_brasil.db")
 
@@ -38,9 +51,101 @@ CSV_FILE = os.path.join(DATA_PATH, "HIST_PAINEL_COVIDBR_CONSOLIDADO.csv")
 # Arquivo consolidado em formato Parquet
 PARQUET_FILE = os.path.join(DATA_PATH, "HIST_PAINEL_COVIDBR_CONSOLIDADO.parquet")
 
+# Cache Arrow IPC (Feather) sem compressão, lido com memory mapping pelo painel
+FEATHER_FILE = os.path.join(DATA_PATH, "HIST_PAINEL_COVIDBR_CONSOLIDADO.arrow")
+
+# Tabelas de ranking (top-N por período) e base incremental usada para atualizá-las
+RANKINGS_FILE = os.path.join(DATA_PATH, "rankings.parquet")
+RANKINGS_BASE_FILE = os.path.join(DATA_PATH, "rankings_base.parquet")
+
+# Retratos diários por estado e por município (codmun), prontos para mapas coropléticos
+SNAPSHOT_ESTADOS_FILE = os.path.join(DATA_PATH, "snapshots_estados.parquet")
+SNAPSHOT_MUNICIPIOS_FILE = os.path.join(DATA_PATH, "snapshots_municipios.parquet")
+
+# Arquivo consolidado gerado pela etapa de escrita do pipeline ETL
+CONSOLIDATED_CSV = os.path.join(EXTRACT_PATH, "COVIDBR_2020_2025_Consolidated.csv")
+
+# Versões publicadas dos arquivos de saída (uma pasta por execução). O ponteiro
+# RELEASES_PATH/current indica a versão lida pelo painel e pela API
+RELEASES_PATH = os.path.join(DATA_PATH, "releases")
+
+# Padrão de nome dos CSVs semestrais contidos no ZIP
+CSV_PATTERN = "HIST_PAINEL_COVIDBR_*.csv"
+
+# ============================================
+# Execução do pipeline ETL
+# ============================================
+
+# Salva checkpoints Parquet entre etapas (necessário para retomar a execução)
+PIPELINE_CHECKPOINTS = True
+
+# Tamanho dos blocos na escrita incremental do CSV consolidado
+CSV_CHUNK_SIZE = 100_000
+
+# Modo de exportação do CSV: "pandas", "arrow" ou "parallel"
+CSV_EXPORT_MODE = "parallel"
+
+# Compressão do CSV consolidado: None, "gzip" ou "zstd"
+CSV_COMPRESSION = None
+
+# Número de posições mantidas em cada ranking
+RANKING_TOP_N = 20
+
+# Reconstrói os rankings do zero (necessário se o histórico for revisado)
+RANKINGS_REBUILD = False
+
+# Dias por row group nos retratos diários (cada leitura de data lê um único grupo)
+SNAPSHOT_DAYS_PER_ROW_GROUP = 7
+
+# ============================================
+# Métricas de execução do pipeline
+# ============================================
+
+# Histórico de métricas por etapa (JSON lines, uma linha por etapa)
+METRICS_FILE = os.path.join(OUTPUT_PATH, "metrics", "etl_metrics.jsonl")
+
+# Arquivo no formato texto do Prometheus (None desativa a exportação)
+METRICS_PROMETHEUS_FILE = os.environ.get("COVID_METRICS_PROM_FILE")
+
+# ============================================
+# Atualização agendada (ETL.scheduler)
+# ============================================
+
+# Intervalo entre atualizações automáticas (fetch → ETL → carga), em horas
+REFRESH_INTERVAL_HOURS = float(os.environ.get("COVID_REFRESH_INTERVAL_HOURS", 24))
+
+# Trava que impede duas atualizações simultâneas (agendador e main.py)
+REFRESH_LOCK_FILE = os.path.join(OUTPUT_PATH, "refresh.lock")
+
+# Estado da última atualização concluída (ZIP processado)
+REFRESH_STATE_FILE = os.path.join(OUTPUT_PATH, "refresh_state.json")
+
+# Função de coleta executada antes do ETL, no formato "modulo:funcao" (None desativa)
+REFRESH_FETCH = os.environ.get("COVID_REFRESH_FETCH")
+
 # ============================================
 # Configuração padrão de banco de dados
 # ============================================
 
 # Nome padrão da tabela a ser criada ou substituída no SQL
 TABLE_NAME = "covid19_dados"
+
+# ============================================
+# Etapa de qualidade de dados
+# ============================================
+
+# Modo de tratamento: "redistribute" corrige os valores, "flag" apenas sinaliza
+QUALITY_MODE = "redistribute"
+
+# Janela (em dias) usada no z-score robusto e na redistribuição de outliers
+QUALITY_WINDOW = 28
+
+# Limite do z-score robusto a partir do qual um valor diário é outlier
+QUALITY_Z_THRESHOLD = 10.0
+
+# Distância mínima à mediana móvel para um valor ser outlier (evita
+# redistribuir notificações pequenas e isoladas, como os primeiros casos)
+QUALITY_MIN_EXCESS = 50
+
+# Relatório de qualidade gerado pelo ETL
+QUALITY_REPORT_FILE = os.path.join(OUTPUT_PATH, "relatorio_qualidade.csv")
@@ -0,0 +1,313 @@
+"""
+Benchmark harness for the COVID-19 pipeline, dashboard and API.
+
+For each scale, a synthetic ``HIST_PAINEL_COVIDBR`` ZIP is generated (see
+:mod:`benchmarks.synthetic`) in a temporary directory and the following
+benchmarks are measured with :class:`ETL.metrics.StageMetrics`:
+
+- ``run_etl``: extract, parse, clean and derive (``ETL.ETL.run_etl``);
+- ``parquet_write``: consolidated Parquet file, as in the write stage;
+- ``csv_write``: consolidated CSV file in each export mode;
+- ``feather_write``: memory-mappable Feather cache;
+- ``columnar_export``: streamed Parquet / Arrow IPC export of the Feather
+  cache, as served by the API export endpoint;
+- ``save_to_sql``: chunked load into SQLite (``py.save_to_sql``);
+- ``dashboard_load``: dashboard frame opened from the Feather cache, as
+  ``app_covid_dashboard.load_data`` does;
+- ``dashboard_aggregations``: all aggregations of the dashboard tabs, on
+  that Feather-backed frame (categorical strings, ``observed=True``);
+- ``api_serialization``: ``CovidRecordSerializer`` list serialization.
+  The repository's ``models.py``/``serializers.py`` are the ``covid`` app;
+  when no ``covid`` package is importable they are copied into one inside
+  the work directory. Skipped when Django/DRF are not installed.
+
+Every file, including the quality report of ``run_etl``, is written inside
+the temporary work directory, so the production outputs are never touched.
+
+Results are appended as JSON lines, tagged with the scale, so performance
+changes can be compared across commits:
+
+    python -m benchmarks.run_benchmarks --scales 1 5 20
+"""
+
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import aggregations
+from benchmarks.synthetic import generate_zip
+from ETL.ETL import run_etl
+from ETL.export import (
+    CSV_MODES,
+    EXPORT_FORMATS,
+    open_feather,
+    scan_export,
+    stream_columnar,
+    write_csv,
+    write_feather,
+)
+from ETL.metrics import StageMetrics
+from base.config import OUTPUT_PATH
+from py.save_to_sql import save_to_sql
+
+BENCHMARK_FILE = os.path.join(OUTPUT_PATH, "benchmarks", "results.jsonl")
+
+
+def bench_run_etl(ctx: dict, record: dict):
+    """Runs the ETL stages on the synthetic ZIP and keeps the result."""
+    ctx["df"] = run_etl(
+        ctx["zip_path"],
+        os.path.join(ctx["workdir"], "extract"),
+        report_path=os.path.join(ctx["workdir"], "relatorio_qualidade.csv"),
+    )
+    record["rows_out"] = len(ctx["df"])
+
+
+def bench_parquet_write(ctx: dict, record: dict):
+    """Writes the consolidated Parquet file with the pipeline settings."""
+    path = os.path.join(ctx["workdir"], "consolidated.parquet")
+    ctx["df"].to_parquet(path, engine="pyarrow", compression="snappy", index=False)
+    record["rows_in"] = len(ctx["df"])
+    record["bytes_written"] = os.path.getsize(path)
+
+
+def bench_csv_write(ctx: dict, record: dict):
+    """Writes the consolidated CSV file in the mode set in ``ctx``."""
+    stats = write_csv(ctx["df"], os.path.join(ctx["workdir"], "consolidated.csv"), mode=ctx["csv_mode"])
+    record["csv_mode"] = ctx["csv_mode"]
+    record["rows_in"] = len(ctx["df"])
+    record["bytes_written"] = stats["csv_bytes"]
+    record["mb_per_s"] = round(stats["mb_per_s"], 2)
+
+
+def bench_feather_write(ctx: dict, record: dict):
+    """Writes the Feather cache read by the dashboard and the export endpoint."""
+    stats = write_feather(ctx["df"], os.path.join(ctx["workdir"], "consolidated.arrow"))
+    ctx["feather_path"] = stats["path"]
+    record["rows_in"] = len(ctx["df"])
+    record["bytes_written"] = stats["file_bytes"]
+
+
+def bench_columnar_export(ctx: dict, record: dict):
+    """Streams the whole Feather cache in the format set in ``ctx``."""
+    schema, batches = scan_export(ctx["feather_path"])
+    size = sum(len(chunk) for chunk in stream_columnar(schema, batches, ctx["export_format"]))
+    record["export_format"] = ctx["export_format"]
+    record["rows_in"] = len(ctx["df"])
+    record["bytes_written"] = size
+
+
+def bench_save_to_sql(ctx: dict, record: dict):
+    """Loads the dataset into a fresh SQLite file inside the work directory."""
+    cwd = os.getcwd()
+    os.chdir(ctx["workdir"])  # save_to_sql writes covid19_brasil.db in the cwd
+    try:
+        save_to_sql(ctx["df"])
+    finally:
+        os.chdir(cwd)
+    record["rows_in"] = record["rows_out"] = len(ctx["df"])
+
+
+def bench_dashboard_load(ctx: dict, record: dict):
+    """Opens the dashboard frame from the Feather cache (memory-mapped)."""
+    table = open_feather(ctx["feather_path"])
+    columns = [c for c in aggregations.COLUNAS_PAINEL if c in table.column_names]
+    ctx["dashboard_df"] = table.select(columns).to_pandas(split_blocks=True)
+    record["rows_out"] = len(ctx["dashboard_df"])
+
+
+def bench_dashboard_aggregations(ctx: dict, record: dict):
+    """Computes the aggregations of every dashboard tab on the dashboard frame."""
+    df = ctx["dashboard_df"]
+    municipio = df.loc[df["municipio"] != "Not informed"].iloc[0]
+    aggregations.serie_nacional(df)
+    aggregations.serie_municipio(df, municipio["estado"], municipio["municipio"])
+    aggregations.totais_por_regiao(df)
+    aggregations.top_municipios(df)
+    aggregations.top_estados_obitos(df)
+    aggregations.mortalidade_por_estado(df)
+    record["rows_in"] = len(df)
+
+
+def _covid_app(workdir: str):
+    """
+    Makes the ``covid`` Django app importable.
+
+    The app modules live at the repository root (``models.py`` and
+    ``serializers.py``, with relative imports), so unless a ``covid``
+    package is already installed they are copied into ``workdir/covid``.
+    """
+    if importlib.util.find_spec("covid") is not None:
+        return
+    package = os.path.join(workdir, "covid")
+    os.makedirs(package, exist_ok=True)
+    open(os.path.join(package, "__init__.py"), "w").close()
+    for module in ("models.py", "serializers.py"):
+        shutil.copyfile(os.path.join(ROOT, module), os.path.join(package, module))
+    sys.path.insert(0, workdir)
+
+
+def _load_serializer(workdir: str):
+    """Configures Django and imports the API serializer."""
+    import django
+    from django.conf import settings
+
+    _covid_app(workdir)
+
+    if not settings.configured:
+        settings.configure(
+            INSTALLED_APPS=["django.contrib.contenttypes", "django.contrib.auth", "rest_framework", "covid"],
+            DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+        )
+        django.setup()
+
+    from covid.models import CovidRecord
+    from covid.serializers import CovidRecordSerializer
+    return CovidRecord, CovidRecordSerializer
+
+
+def bench_api_serialization(ctx: dict, record: dict):
+    """Serializes the national daily series as the API list endpoint does."""
+    try:
+        CovidRecord, CovidRecordSerializer = _load_serializer(ctx["workdir"])
+        from rest_framework.renderers import JSONRenderer
+    except ImportError as exc:  # Django/DRF not installed
+        record["skipped"] = f"{type(exc).__name__}: {exc}"
+        return
+
+    series = aggregations.serie_nacional(ctx["df"])
+    cumulative = series[["casosNovos", "obitosNovos"]].cumsum()
+    records = [
+        CovidRecord(
+            date=row.data.date(),
+            confirmed=int(confirmed),
+            deaths=int(deaths),
+            new_cases=int(row.casosNovos),
+            new_deaths=int(row.obitosNovos),
+        )
+        for row, confirmed, deaths in zip(
+            series.itertuples(), cumulative["casosNovos"], cumulative["obitosNovos"]
+        )
+    ]
+    payload = JSONRenderer().render(CovidRecordSerializer(records, many=True).data)
+    record["rows_in"] = record["rows_out"] = len(records)
+    record["bytes_written"] = len(payload)
+
+
+# Benchmarks in execution order (later ones reuse the run_etl result)
+BENCHMARKS = {
+    "run_etl": bench_run_etl,
+    "parquet_write": bench_parquet_write,
+    "csv_write": bench_csv_write,
+    "feather_write": bench_feather_write,
+    "columnar_export": bench_columnar_export,
+    "save_to_sql": bench_save_to_sql,
+    "dashboard_load": bench_dashboard_load,
+    "dashboard_aggregations": bench_dashboard_aggregations,
+    "api_serialization": bench_api_serialization,
+}
+
+
+# Benchmarks that produce the inputs of others
+DEPENDENCIES = {
+    "columnar_export": ["feather_write"],
+    "dashboard_load": ["feather_write"],
+    "dashboard_aggregations": ["feather_write", "dashboard_load"],
+}
+
+def run_benchmarks(
+    scales: list = (1, 5, 20),
+    day_scale: int = 1,
+    repeat: int = 1,
+    only: list = None,
+    output: str = BENCHMARK_FILE,
+    keep: bool = False,
+) -> StageMetrics:
+    """
+    Runs the benchmarks for each scale and records the results.
+
+    Parameters
+    ----------
+    scales : list of int
+        Municipality multipliers of the synthetic datasets.
+    day_scale : int
+        Day multiplier of the synthetic datasets.
+    repeat : int
+        Repetitions of each benchmark (one record per repetition).
+    only : list of str, optional
+        Subset of benchmarks to run. ``run_etl`` always runs, since the
+        other benchmarks use its result, as do the benchmarks that produce
+        the inputs of the selected ones (see ``DEPENDENCIES``).
+    output : str
+        JSON lines file that receives the results.
+    keep : bool
+        Keep the temporary work directories.
+
+    Returns
+    -------
+    StageMetrics
+        Collected records.
+    """
+    required = {"run_etl"} | {dep for name in only or BENCHMARKS for dep in DEPENDENCIES.get(name, [])}
+    selected = [name for name in BENCHMARKS if not only or name in only or name in required]
+    metrics = StageMetrics(pipeline="benchmark")
+
+    for scale in scales:
+        workdir = tempfile.mkdtemp(prefix=f"covid_bench_{scale}x_")
+        ctx = {"workdir": workdir, "zip_path": os.path.join(workdir, "synthetic.zip")}
+        generate_zip(ctx["zip_path"], scale=scale, day_scale=day_scale)
+        try:
+            for name in selected:
+                # csv_write runs once per CSV mode, columnar_export once per format
+                variants = {"csv_write": CSV_MODES, "columnar_export": list(EXPORT_FORMATS)}.get(name, [None])
+                for variant in variants:
+                    ctx["csv_mode"] = ctx["export_format"] = variant
+                    for _ in range(repeat):
+                        with metrics.stage(name) as record:
+                            record["scale"] = scale
+                            record["day_scale"] = day_scale
+                            BENCHMARKS[name](ctx, record)
+        finally:
+            if not keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\nBenchmark results:")
+    print(f"{'benchmark':<28}{'scale':>7}{'rows':>12}{'wall (s)':>11}{'peak RSS (MB)':>15}")
+    for record in metrics.records:
+        rows = record.get("rows_in") or record.get("rows_out") or 0
+        if record.get("skipped"):
+            print(f"{record['stage']:<28}{record['scale']:>6}x  skipped ({record['skipped']})")
+            continue
+        variant = record.get("csv_mode") or record.get("export_format")
+        name = f"{record['stage']} ({variant})" if variant else record["stage"]
+        print(
+            f"{name:<28}{record['scale']:>6}x{rows:>12,}"
+            f"{record['wall_time_s']:>11.3f}{(record['peak_rss_bytes'] or 0) / 1024 / 1024:>15.1f}"
+        )
+
+    if output:
+        metrics.write_json(output)
+    return metrics
+
+
+def main(argv: list = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="COVID-19 pipeline benchmarks.")
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 5, 20], help="Municipality multipliers.")
+    parser.add_argument("--day-scale", type=int, default=1, help="Day multiplier.")
+    parser.add_argument("--repeat", type=int, default=1, help="Repetitions of each benchmark.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run.")
+    parser.add_argument("--output", default=BENCHMARK_FILE, help="JSON lines file for the results.")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary work directories.")
+    args = parser.parse_args(argv)
+    run_benchmarks(args.scales, args.day_scale, args.repeat, args.only, args.output, args.keep)
+
+
+if __name__ == "__main__":
+    main()
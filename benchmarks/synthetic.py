@@ -0,0 +1,228 @@
+"""
+Deterministic generator of synthetic ``HIST_PAINEL_COVIDBR`` datasets.
+
+Produces a ZIP archive with semester CSV files in the exact layout published
+by the Ministry of Health (``;``-separated, same columns and naming), with
+national, state and municipal rows, plus one series per state of cases not
+attributed to a municipality (empty ``municipio``, ``codmun`` = UF code
+followed by ``0000``, no population). The same ``seed`` and scale always
+produce the same files, so benchmark runs are comparable.
+
+Scale:
+- ``scale`` multiplies the number of municipalities (1x = 100);
+- ``day_scale`` multiplies the number of days (1x = 365).
+
+The 1x dataset is small on purpose (56,575 rows, about 0.5% of the real
+files, which cover 5,570 municipalities over roughly 5.5 years): it is the
+quick smoke run. ``--scale 56`` matches the real number of municipalities,
+and ``--scale 56 --day-scale 5`` approximates the full real row count.
+
+Usage:
+
+    python -m benchmarks.synthetic input/synthetic_5x.zip --scale 5
+"""
+
+import argparse
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+# Column order of the official HIST_PAINEL_COVIDBR files
+COLUMNS = [
+    "regiao", "estado", "municipio", "coduf", "codmun", "codRegiaoSaude",
+    "nomeRegiaoSaude", "data", "semanaEpi", "populacaoTCU2019",
+    "casosAcumulado", "casosNovos", "obitosAcumulado", "obitosNovos",
+    "Recuperadosnovos", "emAcompanhamentoNovos", "interior/metropolitana",
+]
+
+# Federative units: (UF, IBGE code, region)
+STATES = [
+    ("RO", 11, "Norte"), ("AC", 12, "Norte"), ("AM", 13, "Norte"),
+    ("RR", 14, "Norte"), ("PA", 15, "Norte"), ("AP", 16, "Norte"),
+    ("TO", 17, "Norte"), ("MA", 21, "Nordeste"), ("PI", 22, "Nordeste"),
+    ("CE", 23, "Nordeste"), ("RN", 24, "Nordeste"), ("PB", 25, "Nordeste"),
+    ("PE", 26, "Nordeste"), ("AL", 27, "Nordeste"), ("SE", 28, "Nordeste"),
+    ("BA", 29, "Nordeste"), ("MG", 31, "Sudeste"), ("ES", 32, "Sudeste"),
+    ("RJ", 33, "Sudeste"), ("SP", 35, "Sudeste"), ("PR", 41, "Sul"),
+    ("SC", 42, "Sul"), ("RS", 43, "Sul"), ("MS", 50, "Centro-Oeste"),
+    ("MT", 51, "Centro-Oeste"), ("GO", 52, "Centro-Oeste"), ("DF", 53, "Centro-Oeste"),
+]
+
+BASE_MUNICIPALITIES = 100
+BASE_DAYS = 365
+START_DATE = "2020-02-25"
+
+# Share of municipal days with a retroactive correction / a reporting spike
+NEGATIVE_RATE = 0.001
+SPIKE_RATE = 0.0005
+
+# Share of the state cases not attributed to a municipality
+UNKNOWN_SHARE = 0.01
+
+
+def _municipalities(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Municipality attributes, distributed round-robin across the states."""
+    state_idx = np.arange(n) % len(STATES)
+    seq = np.arange(n) // len(STATES) + 1
+    uf = np.array([STATES[i][0] for i in state_idx])
+    coduf = np.array([STATES[i][1] for i in state_idx])
+    region = np.array([STATES[i][2] for i in state_idx])
+
+    return pd.DataFrame({
+        "regiao": region,
+        "estado": uf,
+        "municipio": [f"Municipio {u} {s:04d}" for u, s in zip(uf, seq)],
+        "coduf": coduf,
+        "codmun": coduf * 10000 + seq,
+        "codRegiaoSaude": coduf * 1000 + (seq - 1) // 10 + 1,
+        "nomeRegiaoSaude": [f"REGIAO {u} {(s - 1) // 10 + 1:02d}" for u, s in zip(uf, seq)],
+        "populacaoTCU2019": np.round(rng.lognormal(10, 1.2, n)).astype(np.int64) + 1000,
+        "interior/metropolitana": (rng.random(n) < 0.2).astype(np.int64),
+    })
+
+
+def _daily_counts(pop: np.ndarray, days: int, rng: np.random.Generator) -> tuple:
+    """Daily new cases and deaths (municipalities × days) following three waves."""
+    t = np.arange(days)
+    waves = np.zeros(days)
+    for center, width, height in [(0.25, 0.06, 1.0), (0.55, 0.08, 1.8), (0.85, 0.05, 2.5)]:
+        waves += height * np.exp(-0.5 * ((t / max(days - 1, 1) - center) / width) ** 2)
+
+    intensity = rng.uniform(0.5, 1.5, (len(pop), 1))
+    cases = rng.poisson(pop[:, None] * 4e-4 * intensity * waves[None, :]).astype(np.int64)
+    deaths = rng.binomial(cases, 0.02).astype(np.int64)
+
+    # Reporting artifacts: retroactive corrections and batch spikes
+    negative = rng.random(cases.shape) < NEGATIVE_RATE
+    cases[negative] = -rng.integers(1, 50, negative.sum())
+    spike = rng.random(cases.shape) < SPIKE_RATE
+    cases[spike] = cases[spike] * 20 + 100
+    return cases, deaths
+
+
+def _unknown_municipality(municipal: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """Per-state series of cases not attributed to a municipality."""
+    keys = ["regiao", "estado", "coduf", "data", "semanaEpi"]
+    unknown = municipal.groupby(keys, as_index=False)[["casosNovos"]].sum()
+    unknown["casosNovos"] = rng.poisson(unknown["casosNovos"].clip(lower=0) * UNKNOWN_SHARE)
+    unknown["obitosNovos"] = rng.binomial(unknown["casosNovos"], 0.02)
+    by_state = unknown.groupby("estado", sort=False)
+    unknown["casosAcumulado"] = by_state["casosNovos"].cumsum()
+    unknown["obitosAcumulado"] = by_state["obitosNovos"].cumsum()
+    unknown["codmun"] = unknown["coduf"] * 10000
+    return unknown
+
+
+def _epi_week(dates: pd.DatetimeIndex) -> np.ndarray:
+    """Epidemiological week (weeks starting on Sunday)."""
+    return ((dates + pd.Timedelta(days=1)).isocalendar().week).to_numpy()
+
+
+def generate_dataframe(scale: int = 1, day_scale: int = 1, seed: int = 2020) -> pd.DataFrame:
+    """
+    Generates the synthetic dataset as a DataFrame (all columns as in the CSV).
+
+    Parameters
+    ----------
+    scale : int
+        Multiplier of the number of municipalities.
+    day_scale : int
+        Multiplier of the number of days.
+    seed : int
+        Seed of the random generator.
+
+    Returns
+    -------
+    pandas.DataFrame
+        National, state, municipal and unknown-municipality rows ordered
+        by date.
+    """
+    rng = np.random.default_rng(seed)
+    munis = _municipalities(BASE_MUNICIPALITIES * scale, rng)
+    days = BASE_DAYS * day_scale
+    dates = pd.date_range(START_DATE, periods=days, freq="D")
+    cases, deaths = _daily_counts(munis["populacaoTCU2019"].to_numpy(), days, rng)
+
+    n = len(munis)
+    municipal = munis.loc[np.repeat(np.arange(n), days)].reset_index(drop=True)
+    municipal["data"] = np.tile(dates.strftime("%Y-%m-%d"), n)
+    municipal["semanaEpi"] = np.tile(_epi_week(dates), n)
+    municipal["casosNovos"] = cases.ravel()
+    municipal["obitosNovos"] = deaths.ravel()
+    municipal["casosAcumulado"] = np.cumsum(cases, axis=1).ravel()
+    municipal["obitosAcumulado"] = np.cumsum(deaths, axis=1).ravel()
+
+    # State and national totals include the cases without municipality
+    unknown = _unknown_municipality(municipal, rng)
+    reported = pd.concat([municipal, unknown], ignore_index=True, sort=False)
+    counts = ["casosNovos", "obitosNovos", "casosAcumulado", "obitosAcumulado", "populacaoTCU2019"]
+    state = (
+        reported.groupby(["regiao", "estado", "coduf", "data", "semanaEpi"], as_index=False)[counts]
+        .sum()
+    )
+    national = (
+        reported.groupby(["data", "semanaEpi"], as_index=False)[counts]
+        .sum()
+        .assign(regiao="Brasil", coduf=76)
+    )
+
+    df = pd.concat([national, state, reported], ignore_index=True, sort=False)
+    df = df.reindex(columns=COLUMNS)
+    for col in ["codmun", "codRegiaoSaude", "populacaoTCU2019", "interior/metropolitana"]:
+        df[col] = df[col].astype("Int64")
+    return df.sort_values("data", kind="stable").reset_index(drop=True)
+
+
+def semester_files(df: pd.DataFrame, release: str = "05set2025") -> dict:
+    """Splits the dataset into the official semester files (name → DataFrame)."""
+    dates = pd.to_datetime(df["data"])
+    part = np.where(dates.dt.month <= 6, 1, 2)
+    files = {}
+    for (year, half), group in df.groupby([dates.dt.year, part], sort=True):
+        files[f"HIST_PAINEL_COVIDBR_{year}_Parte{half}_{release}.csv"] = group
+    return files
+
+
+def generate_zip(zip_path: str, scale: int = 1, day_scale: int = 1, seed: int = 2020) -> str:
+    """
+    Writes a ZIP archive of semester CSV files in the HIST_PAINEL_COVIDBR layout.
+
+    Parameters
+    ----------
+    zip_path : str
+        Destination of the ZIP file.
+    scale, day_scale, seed
+        See :func:`generate_dataframe`.
+
+    Returns
+    -------
+    str
+        Path of the generated ZIP file.
+    """
+    df = generate_dataframe(scale=scale, day_scale=day_scale, seed=seed)
+    os.makedirs(os.path.dirname(zip_path) or ".", exist_ok=True)
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, group in semester_files(df).items():
+            # Fixed timestamp keeps the archive byte-for-byte reproducible
+            info = zipfile.ZipInfo(name, date_time=(2025, 9, 5, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, group.to_csv(sep=";", index=False))
+    print(f"Synthetic dataset ({len(df):,} rows, scale {scale}x/{day_scale}x) saved to: {zip_path}")
+    return zip_path
+
+
+def main(argv: list = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Synthetic HIST_PAINEL_COVIDBR generator.")
+    parser.add_argument("zip_path", help="Destination ZIP file.")
+    parser.add_argument("--scale", type=int, default=1, help="Municipality multiplier (1x = 100, 56x ≈ real).")
+    parser.add_argument("--day-scale", type=int, default=1, help="Day multiplier (1x = 365).")
+    parser.add_argument("--seed", type=int, default=2020)
+    args = parser.parse_args(argv)
+    generate_zip(args.zip_path, scale=args.scale, day_scale=args.day_scale, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,19 @@ Script principal do pipeline ETL COVID-19 Brasil.
 
 Etapas executadas:
 1. Extração e transformação dos dados (ETL)
-2. Salvamento em formato Parquet
+2. Salvamento em formato CSV e Parquet
 3. Envio para banco de dados SQL
+
+Aceita as mesmas opções de linha de comando do pipeline (``--stages``,
+``--resume-from``, ``--zip``, ``--no-checkpoints``, ``--metrics-json``,
+``--metrics-prometheus``). Cada etapa, inclusive a carga no SQL, é medida
+por ``ETL.metrics.StageMetrics``.
+
+A execução usa a mesma trava do agendador (``ETL.scheduler``), e a carga no
+SQL substitui a tabela atomicamente por meio de uma tabela sombra. Os
+arquivos da etapa de escrita vão para uma nova versão (``ETL.release``),
+publicada só depois da carga no SQL: se ela falhar, painel e API continuam
+na versão anterior.
 """
 
 import os
@@ -16,39 +27,74 @@ project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(project_root)
 
 # Importações de módulos internos
-from ETL.etl import executar_etl
+from ETL.metrics import StageMetrics
+from ETL.pipeline import parse_args, run_pipeline, save_metrics, select_stages
+from ETL.release import discard, new_release, publish
+from ETL.scheduler import RefreshInProgress, job_lock
 from py.save_to_sql import save_to_sql
 from base.database import init_db
 
 
-def main():
+def main(argv=None):
     """Função principal que executa o pipeline ETL completo."""
     print("Iniciando pipeline ETL COVID-19 Brasil...\n")
+    args = parse_args(argv)
 
-    # Definição dos caminhos de entrada, saída e armazenamento
-    base_dir = project_root
-    zip_path = os.path.join(base_dir, "input", "HIST_PAINEL_COVIDBR_05set2025.zip")
-    extract_path = os.path.join(base_dir, "output")
-    parquet_path = os.path.join(base_dir, "data", "HIST_PAINEL_COVIDBR_CONSOLIDADO.parquet")
+    # Métricas de tempo, memória, linhas e bytes de cada etapa
+    metrics = StageMetrics()
+    try:
+        # Impede que uma execução manual se sobreponha à atualização agendada
+        with job_lock():
+            run_main_stages(args, metrics)
+    except RefreshInProgress as e:
+        print(f"Pipeline não executado: {e}")
+    finally:
+        save_metrics(metrics, args)
 
-    # 1. Executar o processo ETL (extração e transformação dos dados)
+
+def run_main_stages(args, metrics):
+    """Executa as etapas do pipeline e a carga no SQL, registrando as métricas."""
+    # 1-2. Executar o pipeline ETL (extract, parse, clean, derive, write)
     print("Executando processo ETL...")
-    df_final = executar_etl(zip_path, extract_path)
+    # Os arquivos são escritos em uma nova versão, publicada após a carga no SQL
+    stages = select_stages(args.stages, args.resume_from)
+    release_dir = new_release() if "write" in stages else None
+    try:
+        df_final = run_pipeline(
+            zip_path=args.zip_path,
+            stages=args.stages,
+            resume_from=args.resume_from,
+            checkpoints=not args.no_checkpoints,
+            metrics=metrics,
+            release_dir=release_dir,
+            publish_release=False,
+        )
+    except BaseException:
+        if release_dir:
+            discard(release_dir)
+        raise
 
-    # 2. Salvar o resultado consolidado em formato Parquet
-    print("\nSalvando dataset consolidado em formato Parquet...")
-    df_final.to_parquet(parquet_path, engine="pyarrow", compression="snappy", index=False)
-    print(f"Arquivo salvo em: {parquet_path}")
-    print(f"Tamanho final: {os.path.getsize(parquet_path) / 1024 / 1024:.2f} MB")
+    # Sem DataFrame ao final (ex.: apenas extract), não há o que enviar ao SQL
+    if not isinstance(df_final, pd.DataFrame):
+        print("\nPipeline ETL executado com sucesso.")
+        return
 
     # 3. Salvar o dataset em banco de dados SQL
     try:
-        init_db()  # Inicializa a conexão com o banco
-        save_to_sql(df_final)  # Insere os dados na tabela de destino
+        with metrics.stage("load", rows_in=len(df_final)) as record:
+            init_db()  # Inicializa a conexão com o banco
+            save_to_sql(df_final, atomic=True)  # Substitui a tabela de destino (via tabela sombra)
+            record["rows_out"] = len(df_final)
         print("Dados enviados ao banco SQL com sucesso.")
     except Exception as e:
         print(f"Erro ao salvar no SQL: {e}")
+        if release_dir:
+            discard(release_dir)
+            print("Nova versão dos arquivos descartada; painel e API continuam na versão anterior.")
+        return
 
+    if release_dir:
+        publish(release_dir)
     print("\nPipeline ETL executado com sucesso.")
 
 
@@ -3,14 +3,23 @@ Módulo para salvar um DataFrame em um banco de dados SQL.
 
 Compatível com SQLite, PostgreSQL, MySQL e outros bancos suportados
 pelo SQLAlchemy.
+
+No modo atômico (``atomic=True``) os dados são gravados em uma tabela
+sombra (``<tabela>__shadow``) e só substituem a tabela de destino ao final,
+em uma única transação: os leitores nunca veem a tabela vazia ou
+parcialmente carregada. No SQLite o banco passa a usar o modo WAL, em que
+as leituras não bloqueiam durante a carga.
 """
 
 import pandas as pd
 from sqlalchemy import create_engine
 from tqdm import tqdm
 
+# Sufixo da tabela sombra usada nas cargas atômicas
+SHADOW_SUFFIX = "__shadow"
+
 
-def save_to_sql(df):
+def save_to_sql(df, atomic=False):
     """
     Salva um DataFrame em um banco de dados SQL.
 
@@ -18,6 +27,10 @@ def save_to_sql(df):
     ----------
     df : pandas.DataFrame
         DataFrame contendo os dados a serem salvos.
+    atomic : bool
+        Se True, substitui o conteúdo da tabela pelo DataFrame por meio de
+        uma tabela sombra, trocada atomicamente ao final da carga. Se False
+        (padrão), acrescenta os dados à tabela existente.
 
     Notas
     -----
@@ -32,10 +45,17 @@ def save_to_sql(df):
     # Nome da tabela de destino no banco
     table_name = "covid19_painel"
 
+    # No modo atômico a carga vai para a tabela sombra
+    target = f"{table_name}{SHADOW_SUFFIX}" if atomic else table_name
+    if atomic and engine.dialect.name == "sqlite":
+        # WAL: leitores continuam lendo a versão anterior durante a carga
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
     # Define o tamanho dos blocos para inserção incremental
     chunk_size = 50_000
 
-    print(f"Salvando {len(df):,} registros na tabela '{table_name}' "
+    print(f"Salvando {len(df):,} registros na tabela '{target}' "
           f"em blocos de {chunk_size} linhas...")
 
     # Inserção dos dados em blocos (chunks)
@@ -43,10 +63,37 @@ def save_to_sql(df):
                   desc="Enviando ao banco SQL",
                   unit="chunk"):
         df.iloc[i:i + chunk_size].to_sql(
-            table_name,
+            target,
             engine,
-            if_exists="append",
+            # A tabela sombra é recriada a cada carga
+            if_exists="replace" if atomic and i == 0 else "append",
             index=False
         )
 
+    if atomic:
+        swap_table(engine, target, table_name)
+
     print(f"Dados salvos com sucesso no banco SQLite (covid19_brasil.db).")
+
+
+def swap_table(engine, shadow, table_name):
+    """
+    Substitui ``table_name`` pela tabela ``shadow`` em uma única transação.
+
+    Parâmetros
+    ----------
+    engine : sqlalchemy.engine.Engine
+        Conexão com o banco.
+    shadow : str
+        Tabela já carregada com os novos dados.
+    table_name : str
+        Tabela lida pelas aplicações.
+    """
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # O driver sqlite3 não abre transação para DDL; sem o BEGIN o
+            # DROP e o RENAME seriam confirmados separadamente
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{table_name}"')
+        conn.exec_driver_sql(f'ALTER TABLE "{shadow}" RENAME TO "{table_name}"')
+    print(f"Tabela '{shadow}' promovida a '{table_name}'.")
@@ -1,6 +1,7 @@
 import pandas as pd
 import requests
 from datetime import datetime
+from django.db import transaction
 from ...models import CovidRecord
 
 def fetch_covid_data_sp():
@@ -27,15 +28,22 @@ def fetch_covid_data_sp():
     df["new_cases"] = df["confirmed"].diff().fillna(0).astype(int)
     df["new_deaths"] = df["deaths"].diff().fillna(0).astype(int)
 
-    # salvar no banco
-    CovidRecord.objects.all().delete()
-    for _, row in df.iterrows():
-        CovidRecord.objects.create(
-            date=row["date"].date(),
-            confirmed=int(row["confirmed"]),
-            deaths=int(row["deaths"]),
-            new_cases=int(row["new_cases"]),
-            new_deaths=int(row["new_deaths"]),
+    # montar os registros antes de abrir a transação (fora do caminho das leituras)
+    records = [
+        CovidRecord(
+            date=row.date.date(),
+            confirmed=int(row.confirmed),
+            deaths=int(row.deaths),
+            new_cases=int(row.new_cases),
+            new_deaths=int(row.new_deaths),
         )
+        for row in df.itertuples()
+    ]
+
+    # salvar no banco: remoção e inserção na mesma transação, então as
+    # leituras veem os dados antigos ou os novos, nunca a tabela vazia
+    with transaction.atomic():
+        CovidRecord.objects.all().delete()
+        CovidRecord.objects.bulk_create(records, batch_size=5000)
 
     print(f"✅ {len(df)} registros atualizados.")
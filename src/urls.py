@@ -1,10 +1,12 @@
 from rest_framework.routers import DefaultRouter
-from .views import CovidRecordViewSet
+from .views import CovidRecordViewSet, ExportViewSet, RankingViewSet
 from django.contrib import admin
 from django.urls import path, include
 
 router = DefaultRouter()
 router.register(r'data', CovidRecordViewSet, basename='covid')
+router.register(r'rankings', RankingViewSet, basename='rankings')
+router.register(r'export', ExportViewSet, basename='export')
 
 urlpatterns = router.urls
 
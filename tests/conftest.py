@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Same import setup as the project scripts (ETL, base, app from the root)
+sys.path.insert(0, ROOT)
+
+# pytest imports its own ``py`` compatibility module before collecting the
+# tests; drop it so ``py.save_to_sql`` resolves to the project package
+if not getattr(sys.modules.get("py"), "__file__", "").startswith(ROOT):
+    sys.modules.pop("py", None)
+
+
+def _make_rows(estado, municipio, codmun, cumulative, population, start="2021-03-01"):
+    """Daily rows of one series of the cleaned dataset, from ``start``."""
+    return pd.DataFrame({
+        "estado": estado,
+        "municipio": municipio,
+        "codmun": pd.array([codmun] * len(cumulative), dtype="Int64"),
+        "data": pd.date_range(start, periods=len(cumulative)),
+        "casosAcumulado": cumulative,
+        "obitosAcumulado": 0,
+        "populacaoTCU2019": population,
+    })
+
+
+@pytest.fixture
+def make_rows():
+    return _make_rows
@@ -0,0 +1,115 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from ETL.export import (
+    CSV_COMPRESSIONS,
+    CSV_MODES,
+    feather_version,
+    open_feather,
+    read_csv,
+    scan_export,
+    stream_columnar,
+    write_csv,
+    write_feather,
+)
+
+
+def make_export_frame():
+    return pd.DataFrame({
+        "estado": ["AC", "SP", "SP"],
+        "municipio": ["Rio Branco", 'Município "X"; Y', "Not informed"],
+        "codmun": [120040.0, 350000.0, np.nan],
+        "codRegiaoSaude": [12001.0, 35001.0, -1.0],
+        "data": pd.to_datetime(["2020-03-01", "2020-03-02", "2020-03-03"]),
+        "populacaoTCU2019": [413418.5, np.nan, 46289333.0],
+        "casosNovos": [1, -2, 3],
+        "outlierCasos": [False, True, False],
+        "interior/metropolitana": ["1.0", "0.0", "Unknown"],
+    })
+
+
+@pytest.mark.parametrize("compression", list(CSV_COMPRESSIONS))
+@pytest.mark.parametrize("mode", CSV_MODES)
+def test_csv_modes_read_back_as_the_pandas_export(tmp_path, mode, compression):
+    df = make_export_frame()
+    expected = read_csv(write_csv(df, str(tmp_path / "pandas.csv"), mode="pandas")["path"])
+
+    path = write_csv(df, str(tmp_path / "out.csv"), mode=mode, compression=compression, chunk_size=2)["path"]
+    result = read_csv(path)
+
+    # Documented difference: all-integral float columns come back as int64
+    if mode != "pandas":
+        assert result["codRegiaoSaude"].dtype == "int64"
+        result["codRegiaoSaude"] = result["codRegiaoSaude"].astype("float64")
+    pd.testing.assert_frame_equal(result, expected)
+    assert expected["codRegiaoSaude"].tolist() == [12001.0, 35001.0, -1.0]
+    assert expected["outlierCasos"].tolist() == [False, True, False]
+
+
+def test_feather_cache_is_versioned(tmp_path):
+    path = str(tmp_path / "cache.arrow")
+    assert feather_version(path) is None
+
+    first = write_feather(pd.DataFrame({"casosNovos": [1, 2]}), path)["path"]
+    mapped = open_feather(path)
+    second = write_feather(pd.DataFrame({"casosNovos": [3, 4]}), path)["path"]
+
+    # The mapped version is never overwritten; new readers get the new one
+    assert first != second
+    assert feather_version(path) == second
+    assert mapped.column("casosNovos").to_pylist() == [1, 2]
+    assert open_feather(path).column("casosNovos").to_pylist() == [3, 4]
+
+    third = write_feather(pd.DataFrame({"casosNovos": [5]}), path)["path"]
+    versions = sorted(n for n in os.listdir(tmp_path) if not n.endswith(".current"))
+    assert versions == sorted(os.path.basename(p) for p in (second, third))
+
+
+def test_export_groups_small_batches_and_skips_empty_ones():
+    schema = pa.schema([("casosNovos", pa.int64())])
+    batches = [pa.record_batch([pa.array(range(n), pa.int64())], schema=schema) for n in [0, 40, 0, 30, 50, 0, 10]]
+
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(stream_columnar(schema, batches, "parquet", min_rows=60))))
+    assert [parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)] == [70, 60]
+
+    reader = pa.ipc.open_stream(b"".join(stream_columnar(schema, batches, "arrow", min_rows=60)))
+    assert [batch.num_rows for batch in reader] == [70, 60]
+
+
+def test_scan_export_reads_the_current_feather_version(tmp_path):
+    path = str(tmp_path / "cache.arrow")
+    write_feather(pd.DataFrame({"estado": ["AC", "SP"], "casosNovos": [1, 2]}), path)
+    write_feather(pd.DataFrame({"estado": ["AC", "SP", "SP"], "casosNovos": [3, 4, 5]}), path)
+
+    schema, batches = scan_export(path, columns=["casosNovos"], estados=["SP"])
+
+    assert pa.Table.from_batches(list(batches), schema).column("casosNovos").to_pylist() == [4, 5]
+
+
+def test_feather_cache_opens_without_copies(tmp_path):
+    # More rows than the default Feather batch (65,536)
+    n = 200_000
+    df = pd.DataFrame({
+        "data": pd.Timestamp("2020-02-25") + pd.to_timedelta(np.arange(n) % 1000, "D"),
+        "estado": np.array(["AC", "SP", "RJ"])[np.arange(n) % 3],
+        "casosNovos": np.arange(n, dtype="int64"),
+        "populacaoTCU2019": np.arange(n, dtype="float64"),
+    })
+    path = str(tmp_path / "cache.arrow")
+    write_feather(df, path)
+
+    table = open_feather(path)
+    assert all(table.column(name).num_chunks == 1 for name in table.column_names)
+
+    allocated = pa.total_allocated_bytes()
+    frame = table.to_pandas(split_blocks=True)
+    # Columns are views over the mapped file, not copies (~1.6 MB each)
+    assert pa.total_allocated_bytes() - allocated < 64 * 1024
+    assert frame["casosNovos"].tolist() == df["casosNovos"].tolist()
+    assert frame["estado"].astype(str).tolist() == df["estado"].tolist()
@@ -0,0 +1,60 @@
+import os
+import re
+
+import pytest
+
+from ETL.metrics import StageMetrics
+
+SAMPLE = re.compile(r'^[a-z_]+\{pipeline="[^"]*",stage="[^"]*",status="(ok|failed)"\} -?\d+(\.\d+)?$')
+
+
+def test_failed_stage_is_recorded():
+    metrics = StageMetrics()
+
+    with pytest.raises(RuntimeError):
+        with metrics.stage("parse", rows_in=10):
+            raise RuntimeError("bad file")
+
+    [record] = metrics.records
+    assert record["stage"] == "parse"
+    assert record["status"] == "failed"
+    assert record["rows_in"] == 10
+    assert record["wall_time_s"] >= 0
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/io"), reason="Linux I/O counters")
+def test_in_memory_stage_reads_no_bytes(tmp_path):
+    metrics = StageMetrics()
+    with metrics.stage("derive"):
+        sum(range(1000))
+    with metrics.stage("write"):
+        (tmp_path / "out.txt").write_bytes(b"x" * 1000)
+
+    assert metrics.records[0]["bytes_read"] == 0
+    assert metrics.records[0]["bytes_written"] == 0
+    assert metrics.records[1]["bytes_written"] == 1000
+
+
+def test_prometheus_output_is_well_formed():
+    metrics = StageMetrics()
+    with metrics.stage("clean", rows_in=5) as record:
+        record["rows_out"] = 4
+    with pytest.raises(ValueError):
+        with metrics.stage("write"):
+            raise ValueError
+
+    lines = metrics.to_prometheus().splitlines()
+
+    declared = set()
+    for line in lines:
+        if line.startswith("# HELP "):
+            declared.add(line.split()[2])
+        elif line.startswith("# TYPE "):
+            assert line.split()[2] in declared and line.split()[3] == "gauge"
+        elif line.startswith("etl_last_run_timestamp_seconds"):
+            assert re.match(r'^etl_last_run_timestamp_seconds\{pipeline="covid_etl"\} \d+$', line)
+        else:
+            assert SAMPLE.match(line), line
+            assert line.split("{")[0] in declared
+    assert 'etl_stage_rows_out{pipeline="covid_etl",stage="clean",status="ok"} 4' in lines
+    assert any('stage="write",status="failed"' in line for line in lines)
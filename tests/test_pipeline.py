@@ -0,0 +1,19 @@
+import pytest
+
+from ETL.pipeline import parse_args, select_stages
+
+
+def test_select_stages_keeps_pipeline_order():
+    assert select_stages(["write", "derive"]) == ["derive", "write"]
+    assert select_stages(resume_from="derive") == ["derive", "write"]
+    assert select_stages(["clean", "write"], resume_from="write") == ["write"]
+
+
+def test_select_stages_rejects_gaps():
+    with pytest.raises(ValueError, match="missing: derive"):
+        select_stages(["clean", "write"])
+
+
+def test_cli_rejects_gaps():
+    with pytest.raises(SystemExit):
+        parse_args(["--stages", "clean", "write"])
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from ETL.quality import run_quality_checks
+
+
+def make_series(cases, estado="AC", municipio="Cidade", codmun=120001.0, start="2020-03-01"):
+    return pd.DataFrame({
+        "estado": estado,
+        "municipio": municipio,
+        "codmun": codmun,
+        "data": pd.date_range(start, periods=len(cases)),
+        "casosNovos": np.asarray(cases, dtype="int64"),
+        "obitosNovos": 0,
+    })
+
+
+def test_negative_correction_is_absorbed_by_previous_days():
+    df = make_series([10, 10, 10, -15, 5])
+
+    out, report = run_quality_checks(df)
+
+    # Running total 10, 20, 30, 15, 20 becomes 10, 15, 15, 15, 20
+    assert out["casosNovos"].tolist() == [10, 5, 0, 0, 5]
+    assert out["casosNovos"].sum() == df["casosNovos"].sum()
+    assert out["correcaoCasos"].tolist() == [False, False, False, True, False]
+    assert report["casosNovos_correcoes"].tolist() == [1]
+
+
+def test_outlier_excess_is_spread_over_previous_window():
+    cases = [10] * 60
+    cases[40] = 2810
+    df = make_series(cases)
+
+    out, _ = run_quality_checks(df, window=28)
+
+    assert out["outlierCasos"].sum() == 1
+    assert out.loc[40, "casosNovos"] == 10
+    # 2800 cases of excess, 100 per day over the 28 previous days
+    assert out.loc[12:39, "casosNovos"].tolist() == [110] * 28
+    assert out.loc[:11, "casosNovos"].eq(10).all()
+    assert out["casosNovos"].sum() == df["casosNovos"].sum()
+
+
+def test_small_isolated_report_is_not_an_outlier():
+    # MAD is zero around the first cases of a small town
+    df = make_series([0] * 10 + [20] + [0] * 9)
+
+    out, _ = run_quality_checks(df)
+
+    assert not out["outlierCasos"].any()
+    assert out["casosNovos"].tolist() == df["casosNovos"].tolist()
+
+
+def test_state_aggregate_and_unknown_municipality_are_separate_series():
+    state = make_series([100] * 10, estado="SP", municipio="Not informed", codmun=np.nan)
+    unknown = make_series([0, 5, -5, 0, 0, 0, 0, 0, 0, 0], estado="SP", municipio="Not informed", codmun=350000.0)
+    df = pd.concat([state, unknown], ignore_index=True)
+
+    out, report = run_quality_checks(df)
+
+    totals = out.groupby(out["codmun"].isna())["casosNovos"].sum()
+    assert totals[True] == 1000
+    assert totals[False] == 0
+    assert len(report) == 1
+    assert report["codmun"].tolist() == [350000.0]
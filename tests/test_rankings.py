@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ETL.rankings import build_rankings, cumulative_series, update_base
+
+
+@pytest.fixture
+def make_dataset(make_rows):
+    # Crosses a year boundary, for the per-year periods
+    def make():
+        return pd.concat([
+            make_rows("SP", "Not informed", None, [1000, 2000, 3000], 46_000_000, start="2021-12-30"),
+            make_rows("SP", "Not informed", 350000, [5, 10, 15], 600_000, start="2021-12-30"),
+            make_rows("SP", "Campinas", 350950, [900, 1900, 2900], 1_200_000, start="2021-12-30"),
+        ], ignore_index=True)
+    return make
+
+
+def test_unknown_municipality_rows_are_not_the_state_series(make_dataset):
+    series = cumulative_series(make_dataset())
+
+    sp = series[series["nivel"] == "estado"]
+    assert sp["casosAcumulado"].tolist() == [1000, 2000, 3000]
+    assert series.loc[series["nivel"] == "municipio", "municipio"].unique().tolist() == ["Campinas"]
+
+    with_unknown = cumulative_series(make_dataset(), ["codmun"], include_unknown=True)
+    unknown = with_unknown[with_unknown["codmun"] == 350000]
+    assert unknown["casosAcumulado"].tolist() == [5, 10, 15]
+    assert (unknown["populacaoTCU2019"] == 0).all()
+
+
+def test_state_without_aggregate_rows_includes_unknown_municipality(make_dataset):
+    df = make_dataset()
+    df = df[df["codmun"].notna()]
+
+    series = cumulative_series(df)
+
+    sp = series[series["nivel"] == "estado"]
+    assert sp["casosAcumulado"].tolist() == [905, 1910, 2915]
+    assert sp["populacaoTCU2019"].tolist() == [1_200_000] * 3
+
+
+def test_state_ranking_uses_the_aggregate_rows(make_dataset):
+    base = update_base(make_dataset())
+
+    total = base[(base["nivel"] == "estado") & (base["periodo"] == "total")]
+    assert total["fim_casos"].tolist() == [3000]
+    rankings = build_rankings(base)
+    municipal = rankings[rankings["nivel"] == "municipio"]
+    assert municipal["municipio"].unique().tolist() == ["Campinas"]
+
+
+def test_incremental_update_matches_full_build(make_dataset):
+    df = make_dataset()
+    cut = df["data"] <= "2021-12-31"
+
+    incremental = update_base(df, update_base(df[cut]))
+    full = update_base(df)
+
+    key = ["nivel", "estado", "municipio", "periodo"]
+    incremental = incremental.sort_values(key).reset_index(drop=True)
+    full = full.sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(incremental, full[incremental.columns], check_dtype=False)
+    assert np.isfinite(full["fim_casos"]).all()
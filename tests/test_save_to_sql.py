@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from py.save_to_sql import SHADOW_SUFFIX, save_to_sql
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    # save_to_sql writes to covid19_brasil.db in the working directory
+    monkeypatch.chdir(tmp_path)
+    engine = create_engine(f"sqlite:///{tmp_path / 'covid19_brasil.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_atomic_load_replaces_rows_and_drops_shadow(engine):
+    save_to_sql(pd.DataFrame({"estado": ["AC", "SP", "RJ"], "casosNovos": [1, 2, 3]}), atomic=True)
+    second = pd.DataFrame({"estado": ["MG", "BA"], "casosNovos": [4, 5]})
+    save_to_sql(second, atomic=True)
+
+    table = pd.read_sql("SELECT * FROM covid19_painel", engine)
+    pd.testing.assert_frame_equal(table, second)
+
+    names = pd.read_sql("SELECT name FROM sqlite_master WHERE type = 'table'", engine)["name"]
+    assert not any(name.endswith(SHADOW_SUFFIX) for name in names)
+
+
+def test_default_load_appends(engine):
+    df = pd.DataFrame({"estado": ["AC"], "casosNovos": [1]})
+    save_to_sql(df)
+    save_to_sql(df)
+    assert pd.read_sql("SELECT COUNT(*) AS n FROM covid19_painel", engine)["n"][0] == 2
@@ -0,0 +1,107 @@
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+import ETL.scheduler as scheduler
+from ETL.release import current_release, published_path
+from ETL.scheduler import RefreshInProgress, job_lock, refresh
+
+
+def write_zip(path, rows):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("part.csv", "estado;casosNovos\n" + "".join(f"SP;{n}\n" for n in range(rows)))
+
+
+@pytest.fixture
+def refresh_env(tmp_path, monkeypatch):
+    """Input ZIP, state file and releases directory, with the ETL and SQL load faked."""
+    zip_path = tmp_path / "input.zip"
+    write_zip(zip_path, rows=1)
+
+    calls = {"pipeline": 0, "sql": 0, "fail_sql": False}
+
+    def fake_pipeline(zip_path, metrics, release_dir, publish_release):
+        assert not publish_release
+        calls["pipeline"] += 1
+        with open(os.path.join(release_dir, "covid.csv"), "w") as f:
+            f.write(f"run {calls['pipeline']}\n")
+        return pd.DataFrame({"estado": ["SP"], "casosNovos": [1]})
+
+    def fake_save_to_sql(df, atomic):
+        assert atomic
+        calls["sql"] += 1
+        if calls["fail_sql"]:
+            raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(scheduler, "run_pipeline", fake_pipeline)
+    monkeypatch.setattr(scheduler, "save_to_sql", fake_save_to_sql)
+    return {
+        "zip_path": str(zip_path),
+        "state_path": str(tmp_path / "state.json"),
+        "releases_path": str(tmp_path / "releases"),
+        "calls": calls,
+    }
+
+
+def run_refresh(env, **kwargs):
+    return refresh(
+        zip_path=env["zip_path"],
+        state_path=env["state_path"],
+        releases_path=env["releases_path"],
+        **kwargs,
+    )
+
+
+def test_second_job_lock_on_same_path_raises(tmp_path):
+    lock = str(tmp_path / "refresh.lock")
+    with job_lock(lock):
+        with pytest.raises(RefreshInProgress):
+            with job_lock(lock):
+                pass
+    # Released at the end of the block
+    with job_lock(lock):
+        pass
+
+
+def test_refresh_skips_unchanged_input(refresh_env):
+    assert run_refresh(refresh_env) is True
+    assert run_refresh(refresh_env) is False
+    assert refresh_env["calls"]["pipeline"] == 1
+
+    assert run_refresh(refresh_env, force=True) is True
+    assert refresh_env["calls"]["pipeline"] == 2
+
+
+def test_refresh_publishes_release_after_sql_load(refresh_env):
+    releases = refresh_env["releases_path"]
+    run_refresh(refresh_env)
+    first = current_release(releases)
+    with open(published_path("/data/covid.csv", releases)) as f:
+        assert f.read() == "run 1\n"
+
+    run_refresh(refresh_env, force=True)
+    assert current_release(releases) != first
+    with open(published_path("/data/covid.csv", releases)) as f:
+        assert f.read() == "run 2\n"
+
+
+def test_failed_refresh_keeps_previous_release_and_retries(refresh_env):
+    releases = refresh_env["releases_path"]
+    run_refresh(refresh_env)
+    published = current_release(releases)
+
+    # New input, failing SQL load
+    write_zip(refresh_env["zip_path"], rows=2)
+    refresh_env["calls"]["fail_sql"] = True
+    with pytest.raises(RuntimeError):
+        run_refresh(refresh_env)
+    # The new release is discarded and the previous one stays current
+    assert current_release(releases) == published
+    assert sorted(os.listdir(releases)) == sorted(["current", os.path.basename(published)])
+
+    # The failed input is not recorded, so the next run retries it
+    refresh_env["calls"]["fail_sql"] = False
+    assert run_refresh(refresh_env) is True
+    assert refresh_env["calls"]["pipeline"] == 3
@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from ETL.snapshots import build_snapshots
+
+
+def test_unknown_municipality_rows_stay_in_the_municipality_table(make_rows):
+    df = pd.concat([
+        make_rows("SP", "Not informed", None, [1000, 3000], 46_000_000),
+        make_rows("SP", "Not informed", 350000, [5, 15], 600_000),
+        make_rows("SP", "Campinas", 350950, [900, 2900], 1_200_000),
+    ], ignore_index=True)
+
+    states, municipalities = build_snapshots(df)
+
+    assert states["casosAcumulado"].tolist() == [1000, 3000]
+    assert not states.duplicated(["data", "estado"]).any()
+
+    unknown = municipalities[municipalities["codmun"] == 350000]
+    assert unknown["casosAcumulado"].tolist() == [5, 15]
+    assert unknown["casos_100k"].isna().all()
+    assert len(municipalities) == 4
+
+
+def test_duplicated_state_rows_are_rejected(make_rows):
+    state = make_rows("SP", "Not informed", None, [1000, 3000], 46_000_000)
+
+    with pytest.raises(ValueError, match="Duplicated state"):
+        build_snapshots(pd.concat([state, state], ignore_index=True))
+
+
+def test_population_keeps_fractions_and_missing_values(make_rows):
+    df = pd.concat([
+        make_rows("SP", "Not informed", None, [1000, 3000], 200_000.5),
+        make_rows("AC", "Not informed", None, [10, 30], None),
+    ], ignore_index=True)
+
+    states, _ = build_snapshots(df)
+
+    sp = states[states["estado"] == "SP"]
+    assert sp["populacaoTCU2019"].tolist() == [200_000.5, 200_000.5]
+    assert sp["casos_100k"].tolist() == pytest.approx([1000 / 2.000005, 3000 / 2.000005], rel=1e-6)
+
+    ac = states[states["estado"] == "AC"]
+    assert ac["casosAcumulado"].tolist() == [10, 30]
+    assert ac["populacaoTCU2019"].isna().all()
+    assert ac["casos_100k"].isna().all()
@@ -2,10 +2,21 @@
 ViewSet para o modelo CovidRecord.
 
 Fornece endpoints somente leitura (GET) para listar e detalhar
-registros de COVID-19 armazenados no banco de dados.
+registros de COVID-19 armazenados no banco de dados, para consultar
+os rankings pré-calculados pelo ETL e para exportar o dataset consolidado
+em formato colunar (Parquet/Arrow).
 """
 
-from rest_framework import viewsets
+import os
+
+from django.http import StreamingHttpResponse
+from rest_framework import status, viewsets
+from rest_framework.response import Response
+
+from ETL.export import EXPORT_FORMATS, feather_version, scan_export, stream_columnar
+from ETL.rankings import load_rankings
+from ETL.release import published_path
+from base.config import FEATHER_FILE, PARQUET_FILE, RANKINGS_FILE
 from .models import CovidRecord
 from .serializers import CovidRecordSerializer
 
@@ -24,3 +35,95 @@ class CovidRecordViewSet(viewsets.ReadOnlyModelViewSet):
 
     # Serializer responsável pela conversão dos dados
     serializer_class = CovidRecordSerializer
+
+
+class RankingViewSet(viewsets.ViewSet):
+    """
+    Rankings de municípios e estados gerados pelo ETL (``ETL.rankings``).
+
+    Lê a tabela Parquet pré-calculada em vez de agregar o banco a cada
+    requisição. Parâmetros opcionais de consulta:
+    - ``nivel``: ``municipio`` ou ``estado``
+    - ``periodo``: ``total`` ou um ano (ex.: ``2021``)
+    - ``metrica``: ``casos``, ``obitos``, ``casos_100k`` ou ``obitos_100k``
+    - ``n``: número de posições (padrão: todas as armazenadas)
+
+    - GET /rankings/?nivel=municipio&periodo=2021&metrica=obitos&n=10
+    """
+
+    def list(self, request):
+        params = request.query_params
+
+        n = params.get('n')
+        if n is not None:
+            try:
+                n = int(n)
+            except ValueError:
+                return Response({'detail': "Parâmetro 'n' deve ser um inteiro."}, status=status.HTTP_400_BAD_REQUEST)
+
+        arquivo = published_path(RANKINGS_FILE)
+        if not os.path.exists(arquivo):
+            return Response({'detail': 'Rankings ainda não foram gerados pelo ETL.'}, status=status.HTTP_404_NOT_FOUND)
+
+        rankings = load_rankings(
+            arquivo,
+            nivel=params.get('nivel'),
+            periodo=params.get('periodo'),
+            metrica=params.get('metrica'),
+            n=n,
+        )
+        return Response(rankings.to_dict(orient='records'))
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """
+    Exportação em lote do dataset consolidado em formato colunar.
+
+    Os dados são lidos do cache Feather (ou do Parquet) gerado pelo ETL em
+    lotes de registros e enviados à medida que são codificados, com memória
+    constante no servidor, qualquer que seja o tamanho da extração.
+    Parâmetros opcionais de consulta:
+    - ``formato``: ``parquet`` (padrão) ou ``arrow`` (Arrow IPC stream)
+    - ``estado`` / ``municipio``: um ou mais valores separados por vírgula
+    - ``inicio`` / ``fim``: intervalo de datas (``AAAA-MM-DD``), inclusivo
+    - ``colunas``: colunas exportadas, separadas por vírgula
+
+    - GET /export/?formato=parquet&estado=SP,RJ&inicio=2021-01-01
+    """
+
+    def list(self, request):
+        params = request.query_params
+
+        formato = params.get('formato', 'parquet')
+        if formato not in EXPORT_FORMATS:
+            return Response(
+                {'detail': f"Formato inválido: use {' ou '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Arquivos da versão publicada pelo ETL (ver ETL.release)
+        origem = feather_version(published_path(FEATHER_FILE)) or published_path(PARQUET_FILE)
+        if not os.path.exists(origem):
+            return Response({'detail': 'Dataset ainda não foi gerado pelo ETL.'}, status=status.HTTP_404_NOT_FOUND)
+
+        def lista(nome):
+            valor = params.get(nome)
+            return [v.strip() for v in valor.split(',') if v.strip()] if valor else None
+
+        # Filtros e colunas são validados antes de iniciar a resposta
+        try:
+            schema, lotes = scan_export(
+                origem,
+                columns=lista('colunas'),
+                estados=lista('estado'),
+                municipios=lista('municipio'),
+                start=params.get('inicio'),
+                end=params.get('fim'),
+            )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type, extensao = EXPORT_FORMATS[formato]
+        response = StreamingHttpResponse(stream_columnar(schema, lotes, formato), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="covid19_brasil{extensao}"'
+        return response